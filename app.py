@@ -3,23 +3,69 @@ Flask Web Interface for GitHubProfileBot
 Provides a simple web UI for interacting with Claude-powered bot
 """
 
-from flask import Flask, render_template, request, jsonify, Response
+from flask import Flask, render_template, request, jsonify, Response, make_response
 import os
 import json
+import uuid
+
+import prefork
+from profiling import RequestProfiler, should_profile, span
+
+SESSION_COOKIE = "session_id"
+
+# Opt-in profiling: set PROFILE_SAMPLE_RATE (0.0-1.0), or set
+# PROFILE_HEADER_SECRET and send it as "X-Profile: <secret>"
+PROFILE_HEADER = "X-Profile"
+PROFILE_HEADER_SECRET = os.getenv("PROFILE_HEADER_SECRET") or None
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
 
 # Try to use Claude bot first, fall back to rule-based bot
 try:
-    from claude_bot import ClaudePortfolioBot
-    bot = ClaudePortfolioBot(portfolio_data_path="portfolio_data.json")
+    from claude_bot import ClaudePortfolioBot, is_degradable
+    from session_store import SQLiteSessionStore
+    # Conversation history lives in SQLite so any worker can continue a session
+    session_store = SQLiteSessionStore(
+        db_path=os.getenv("SESSION_DB_PATH", "sessions.db"),
+        session_ttl=float(os.getenv("SESSION_TTL_SECONDS", 7 * 24 * 3600)),
+    )
+    bot = ClaudePortfolioBot(portfolio_data_path="portfolio_data.json", session_store=session_store)
+    if os.getenv("PREFETCH_FOLLOWUPS") == "1":
+        bot.enable_prefetch(
+            top_k=int(os.getenv("PREFETCH_TOP_K", "2")),
+            token_budget=int(os.getenv("PREFETCH_TOKEN_BUDGET", "20000")),
+        )
     bot_type = "claude"
 except (ImportError, ValueError):
     from github_profile_bot import GitHubProfileBot
     bot = GitHubProfileBot(portfolio_data_path="portfolio_data.json")
     bot_type = "rule-based"
 
+# Derived read-only structures are built once here; under a pre-forking
+# server with PORTFOLIO_PRELOAD=1 this happens in the master, and
+# gunicorn.conf.py freezes the heap before each fork so workers share these
+# pages copy-on-write instead of duplicating them
+static_payloads = prefork.build_static_payloads(bot)
+
 app = Flask(__name__)
 app.config['JSON_SORT_KEYS'] = False
 
+def _session_id(data: dict) -> str:
+    """Resolve the caller's session from the request body or cookie."""
+    return data.get('session_id') or request.cookies.get(SESSION_COOKIE) or uuid.uuid4().hex
+
+def _with_session(response: Response, session_id: str) -> Response:
+    """Attach the session cookie so the next request finds its history."""
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+    return response
+
+def _start_profiler(name: str):
+    """Start a profiler if this request opted in or was sampled, else None."""
+    if not should_profile(request.headers.get(PROFILE_HEADER), PROFILE_SAMPLE_RATE, PROFILE_HEADER_SECRET):
+        return None
+    return RequestProfiler(name, output_dir=PROFILE_DIR, max_files=PROFILE_MAX_FILES).start()
+
 @app.route('/')
 def index():
     """Serve the main chatbot page."""
@@ -28,26 +74,53 @@ def index():
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """API endpoint for bot queries."""
+    profiler = _start_profiler('chat')
+    if profiler is None:
+        return _chat()
+    
+    try:
+        response = make_response(_chat())
+    finally:
+        profiler.finish()
+    response.headers['Server-Timing'] = profiler.server_timing()
+    response.headers['X-Profile-Id'] = profiler.profile_id
+    return response
+
+def _chat():
+    """Answer a chat query."""
     try:
-        data = request.get_json()
-        query = data.get('query', '').strip()
+        with span("parse_json"):
+            data = request.get_json()
+            query = data.get('query', '').strip()
         
         if not query:
             return jsonify({'error': 'Empty query'}), 400
         
+        session_id = _session_id(data)
+        degraded = False
         if bot_type == "claude":
-            # Stream response for Claude
-            response = bot.chat(query, stream=False)
+            try:
+                response = bot.chat(query, stream=False, session_id=session_id)
+            except Exception as e:
+                if not is_degradable(e):
+                    raise
+                # Upstream unavailable: answer locally instead of a 500
+                degraded = True
+                response = bot.degraded_answer(query)
         else:
             # Use rule-based bot response
-            response = bot.answer_query(query)
+            with span("answer_query"):
+                response = bot.answer_query(query)
         
-        return jsonify({
-            'query': query,
-            'response': response,
-            'success': True,
-            'bot_type': bot_type
-        })
+        with span("serialize"):
+            return _with_session(jsonify({
+                'query': query,
+                'response': response,
+                'success': True,
+                'bot_type': bot_type,
+                'session_id': session_id,
+                'degraded': degraded
+            }), session_id)
     except Exception as e:
         return jsonify({
             'error': str(e),
@@ -60,27 +133,62 @@ def chat_stream():
     if bot_type != "claude":
         return jsonify({'error': 'Streaming only available with Claude bot'}), 400
     
+    profiler = _start_profiler('chat_stream')
     try:
-        data = request.get_json()
-        query = data.get('query', '').strip()
+        with span("parse_json"):
+            data = request.get_json()
+            query = data.get('query', '').strip()
         
         if not query:
+            if profiler:
+                profiler.finish()
             return jsonify({'error': 'Empty query'}), 400
         
+        session_id = _session_id(data)
+        
         def generate():
-            for chunk in bot.chat(query, stream=True):
-                yield f"data: {json.dumps({'chunk': chunk})}\n\n"
+            started = False
+            try:
+                for chunk in bot.chat(query, stream=True, session_id=session_id):
+                    with span("sse_framing"):
+                        frame = f"data: {json.dumps({'chunk': chunk})}\n\n"
+                    started = True
+                    yield frame
+            except Exception as e:
+                if not is_degradable(e):
+                    raise
+                if started:
+                    yield f"data: {json.dumps({'error': str(e)})}\n\n"
+                else:
+                    degraded = bot.degraded_answer(query)
+                    yield f"data: {json.dumps({'chunk': degraded, 'degraded': True})}\n\n"
+        
+        def generate_profiled():
+            try:
+                with profiler.activate():
+                    yield from generate()
+            finally:
+                profiler.finish()
         
-        return Response(generate(), mimetype='text/event-stream')
+        if profiler is None:
+            return _with_session(Response(generate(), mimetype='text/event-stream'), session_id)
+        
+        # The body is produced after this view returns; the generator
+        # re-activates the profiler and finishes it when the stream ends
+        profiler.detach()
+        response = Response(generate_profiled(), mimetype='text/event-stream')
+        response.headers['X-Profile-Id'] = profiler.profile_id
+        return _with_session(response, session_id)
     except Exception as e:
+        if profiler:
+            profiler.finish()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/info/developer')
 def get_developer_info():
     """Get developer information."""
     if bot_type == "claude":
-        info = bot.portfolio_data.get('developer', {})
-        return jsonify(info)
+        return jsonify(static_payloads['developer'])
     else:
         return jsonify(bot.about_developer())
 
@@ -92,20 +200,12 @@ def get_skills():
 @app.route('/api/projects')
 def get_projects():
     """Get all projects."""
-    return jsonify([
-        {
-            'id': p['id'],
-            'name': p.get('name'),
-            'subtitle': p.get('subtitle'),
-            'type': p.get('type')
-        }
-        for p in bot.portfolio_data.get('projects', [])
-    ])
+    return jsonify(static_payloads['projects'])
 
 @app.route('/api/projects/<int:project_id>')
 def get_project(project_id):
     """Get specific project details."""
-    project = bot.projects.get(project_id)
+    project = static_payloads['project_by_id'].get(project_id)
     if not project:
         return jsonify({'error': 'Project not found'}), 404
     return jsonify(project)
@@ -116,5 +216,32 @@ def get_roadmap(focus):
     roadmap = bot.learning_roadmap(focus)
     return jsonify({'roadmap': roadmap})
 
+@app.route('/api/stats/memory')
+def get_memory_stats():
+    """Report this worker's shared vs unique resident memory."""
+    return jsonify(prefork.memory_report())
+
+@app.route('/api/stats/profiles')
+def get_profile_stats():
+    """Report per-profile request counts, latency and token usage."""
+    if bot_type != "claude":
+        return jsonify({})
+    return jsonify(bot.router.get_stats())
+
+@app.route('/api/stats/breaker')
+def get_breaker_stats():
+    """Report upstream circuit breaker state and transition counts."""
+    if bot_type != "claude":
+        return jsonify({})
+    return jsonify(bot.breaker.get_stats())
+
+@app.route('/api/stats/prefetch')
+def get_prefetch_stats():
+    """Report follow-up prefetch hit rate and token spend."""
+    prefetcher = getattr(bot, 'prefetcher', None)
+    if prefetcher is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **prefetcher.get_stats()})
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
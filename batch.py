@@ -0,0 +1,211 @@
+"""
+Batch Query Runner
+Run a file of queries through either bot concurrently and stream results to
+JSONL in completion order, resuming from earlier output when interrupted
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
+
+
+# answer(query) -> (response text, token usage or None)
+AnswerFn = Callable[[str], Tuple[str, Optional[Dict[str, Any]]]]
+
+
+class RateLimiter:
+    """Spread calls evenly so at most `rate` start per second across threads."""
+
+    def __init__(self, rate: float):
+        """Initialize limiter; a rate of 0 disables limiting."""
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the caller may start its next call."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def read_queries(source) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (query_id, query) pairs from plain-text or JSONL lines.
+
+    JSONL lines may carry their own "id"; otherwise the id is a hash of the
+    query text (suffixed for repeats) so it is stable across runs. Lines
+    that do not parse as a JSON object are taken as plain text.
+    """
+    seen: Dict[str, int] = {}
+    for line in source:
+        line = line.strip()
+        if not line:
+            continue
+
+        query_id = None
+        query = line
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A plain-text query that happens to start with "{"
+                record = None
+            if isinstance(record, dict):
+                query = str(record.get("query", "")).strip()
+                query_id = record.get("id")
+        if not query:
+            continue
+
+        if query_id is None:
+            digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+            seen[digest] = seen.get(digest, 0) + 1
+            query_id = digest if seen[digest] == 1 else f"{digest}-{seen[digest]}"
+        yield str(query_id), query
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Collect ids that already succeeded in an earlier run's output."""
+    done = set()
+    try:
+        with open(output_path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line of an interrupted run may be partial
+                    continue
+                if record.get("ok"):
+                    done.add(str(record.get("id")))
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def run_batch(
+    answer: AnswerFn,
+    queries: Iterator[Tuple[str, str]],
+    output_path: str,
+    concurrency: int = 4,
+    rate: float = 0.0,
+    resume: bool = False,
+) -> Dict[str, Any]:
+    """
+    Answer queries concurrently, appending one JSON line per finished query.
+
+    Args:
+        answer: Function answering a single query
+        queries: (query_id, query) pairs
+        output_path: JSONL results file, also used as the resume checkpoint
+        concurrency: Queries in flight at once
+        rate: Maximum queries started per second (0 for unlimited)
+        resume: Skip queries already answered successfully in output_path
+
+    Returns:
+        Run summary with counts, token totals and throughput
+    """
+    skip = completed_ids(output_path) if resume else set()
+    limiter = RateLimiter(rate)
+    write_lock = threading.Lock()
+    # Bound submitted-but-unstarted work so huge inputs are streamed
+    slots = threading.BoundedSemaphore(concurrency * 2)
+    summary: Dict[str, Any] = {"completed": 0, "failed": 0, "skipped": 0, "input_tokens": 0, "output_tokens": 0}
+    started = time.perf_counter()
+
+    def process(out, query_id: str, query: str):
+        try:
+            limiter.acquire()
+            query_started = time.perf_counter()
+            record: Dict[str, Any] = {"id": query_id, "query": query}
+            try:
+                response, usage = answer(query)
+                record.update({"ok": True, "response": response, "usage": usage})
+            except Exception as e:
+                record.update({"ok": False, "error": f"{type(e).__name__}: {e}"})
+            record["elapsed_ms"] = round((time.perf_counter() - query_started) * 1000, 1)
+
+            with write_lock:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                if record["ok"]:
+                    summary["completed"] += 1
+                    for key in ("input_tokens", "output_tokens"):
+                        summary[key] += (usage or {}).get(key, 0)
+                else:
+                    summary["failed"] += 1
+        finally:
+            slots.release()
+
+    with open(output_path, "a" if resume else "w") as out:
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch")
+        try:
+            for query_id, query in queries:
+                if query_id in skip:
+                    summary["skipped"] += 1
+                    continue
+                slots.acquire()
+                executor.submit(process, out, query_id, query)
+            executor.shutdown(wait=True)
+        except KeyboardInterrupt:
+            executor.shutdown(wait=True, cancel_futures=True)
+            summary["interrupted"] = True
+
+    elapsed = time.perf_counter() - started
+    summary["elapsed_s"] = round(elapsed, 2)
+    summary["queries_per_s"] = round(summary["completed"] / elapsed, 2) if elapsed else 0.0
+    return summary
+
+
+def main(argv, bot_name: str, make_answer: Callable[[], AnswerFn]):
+    """
+    Entry point for the `batch` subcommand of the bot CLIs.
+
+    Args:
+        argv: Arguments after "batch"
+        bot_name: Name shown in help text
+        make_answer: Builds the answer function (and its bot) lazily
+    """
+    parser = argparse.ArgumentParser(
+        prog=f"{bot_name} batch",
+        description="Answer a file of queries concurrently and write JSONL results.",
+    )
+    parser.add_argument("input", help="Query file (one query or JSON object per line), or - for stdin")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL results file")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Queries in flight at once")
+    parser.add_argument("-r", "--rate", type=float, default=0.0, help="Max queries started per second (0 = unlimited)")
+    parser.add_argument("--resume", action="store_true", help="Skip queries already answered in the output file")
+    args = parser.parse_args(argv)
+
+    # Check the input before building the bot, which may call out or need keys
+    try:
+        source = sys.stdin if args.input == "-" else open(args.input, "r")
+    except OSError as e:
+        parser.error(f"cannot read {args.input}: {e.strerror}")
+
+    try:
+        answer = make_answer()
+        summary = run_batch(
+            answer,
+            read_queries(source),
+            args.output,
+            concurrency=max(1, args.concurrency),
+            rate=args.rate,
+            resume=args.resume,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    print(json.dumps(summary), file=sys.stderr)
+    if summary.get("interrupted"):
+        print(f"Interrupted. Re-run with --resume to continue into {args.output}.", file=sys.stderr)
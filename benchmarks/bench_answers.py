@@ -0,0 +1,41 @@
+"""
+Benchmark: answer_query with per-call rendering vs the precomputed answer table
+
+    python benchmarks/bench_answers.py [num_queries]
+
+The per-call rows call the current render methods, which already build
+their Markdown with join; they isolate the gain from the table itself,
+not from the rewrite of the original += renderers.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_intents import make_queries, timed
+from github_profile_bot import GitHubProfileBot
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    queries = make_queries(count)
+    bot = GitHubProfileBot()
+    keys = [bot.classify_intent(q) for q in queries]
+
+    print(f"{count:,} queries")
+    timed("render per call (join)", count, lambda: [bot.render_intent(*bot.classify_intent(q)) for q in queries])
+    timed("answer table", count, lambda: [bot.answer_query(q) for q in queries])
+
+    print("\nanswer step only, classification excluded")
+    timed("render per call (join)", count, lambda: [bot.render_intent(*key) for key in keys])
+    timed("answer table", count, lambda: [bot._answers[key] for key in keys])
+
+    misses = sum(key not in bot._answers for key in keys)
+    print(f"\ntable entries: {len(bot._answers)}, misses: {misses}")
+
+
+if __name__ == "__main__":
+    main()
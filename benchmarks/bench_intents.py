@@ -0,0 +1,87 @@
+"""
+Benchmark: per-query intent matching vs vectorized bulk classification
+
+    python benchmarks/bench_intents.py [num_queries]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_profile_bot import GitHubProfileBot
+from intent_matrix import BulkIntentClassifier
+
+
+TEMPLATES = [
+    "Tell me about yourself",
+    "What skills do you have?",
+    "What's your expertise?",
+    "Show me all your projects",
+    "Tell me about {project}",
+    "What tech did you use in {project}?",
+    "How was {project} built with React?",
+    "How can I improve {project}?",
+    "What new project ideas do you have?",
+    "Machine learning roadmap",
+    "NLP learning path",
+    "Full-stack web roadmap",
+    "What are your career interests?",
+    "Pitch yourself to a recruiter",
+    "AI/ML specialist profile",
+    "Are you a backend or frontend person?",
+    "What is the weather like today?",
+    "Do you like pizza?",
+]
+PROJECTS = ["SmartLeaf", "BreatheEasy", "Student Management System", "Movie Recommendation System", "Smart Grocery AI"]
+FILLERS = ["", "please", "quickly", "for my team", "in detail", "again", "thanks!"]
+
+
+def make_queries(count: int, seed: int = 7) -> list:
+    """Generate a synthetic query log."""
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(TEMPLATES).format(project=rng.choice(PROJECTS))} {rng.choice(FILLERS)}".strip()
+        for _ in range(count)
+    ]
+
+
+def timed(label: str, count: int, fn):
+    """Run fn once and print its throughput."""
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {count / elapsed:>12,.0f} queries/s  ({elapsed:.3f}s)")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    queries = make_queries(count)
+    bot = GitHubProfileBot()
+    bulk = BulkIntentClassifier()
+
+    # Real logs sit between these: heavy repeats with a long unique tail
+    rng = random.Random(11)
+    vocabulary = sorted({word for query in queries for word in query.split()})
+    logs = [
+        ("repeated", queries),
+        ("unique, shared vocabulary", [f"{q} {rng.choice(vocabulary)} {rng.choice(vocabulary)}" for q in queries]),
+        ("all unique, new word per query", [f"{q} #{i}" for i, q in enumerate(queries)]),
+    ]
+    for name, log in logs:
+        print(f"\n{count:,} queries, {name}")
+        timed("answer_query loop", count, lambda: [bot.answer_query(q) for q in log])
+        expected = timed("classify_intent loop", count, lambda: [bot.classify_intent(q)[0] for q in log])
+        chunks = timed("BulkIntentClassifier", count, lambda: list(bulk.classify_stream(log)))
+
+        labels = [bulk.labels[i].split(":")[0] for ids, _ in chunks for i in ids]
+        agreement = sum(a == b for a, b in zip(labels, expected)) / count
+        print(f"agreement with classify_intent: {agreement:.2%}")
+
+
+if __name__ == "__main__":
+    main()
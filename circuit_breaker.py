@@ -0,0 +1,196 @@
+"""
+Circuit Breaker for Upstream Calls
+Stop waiting on a failing or slow API: open on high error rate or latency,
+short-circuit while open, and probe recovery with limited trial traffic
+"""
+
+import math
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Optional
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream circuit is open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker driven by a rolling window of calls.
+
+    The circuit opens when, over the last `window` calls (and at least
+    `min_calls`), the error rate reaches `error_rate_threshold`, or when
+    with at least `min_latency_samples` calls the latency percentile
+    overruns its budget. Each call's latency is measured against its own
+    budget (`latency_threshold` seconds unless the caller passes one), so
+    long generations that are expected to take a while do not look slow.
+    After `open_seconds` it lets up to `half_open_max_calls` trial calls
+    through; `half_open_successes` successes close it, any failure
+    re-opens it.
+    """
+
+    def __init__(
+        self,
+        window: int = 50,
+        min_calls: int = 10,
+        error_rate_threshold: float = 0.5,
+        latency_threshold: float = 20.0,
+        latency_percentile: float = 95.0,
+        min_latency_samples: int = 20,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 2,
+        half_open_successes: int = 2,
+    ):
+        """Initialize breaker in the closed state."""
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.latency_threshold = latency_threshold
+        self.latency_percentile = latency_percentile
+        self.min_latency_samples = min_latency_samples
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.half_open_successes = half_open_successes
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._calls: deque = deque(maxlen=window)
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+        self.transitions: Counter = Counter()
+        self.counters: Counter = Counter()
+
+    # ============ State ============
+
+    @property
+    def state(self) -> str:
+        """Current state, moving open -> half-open once the cool-down has passed."""
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def _refresh(self):
+        """Apply the time-based open -> half-open transition; caller holds the lock."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state: str):
+        """Switch state and count the transition; caller holds the lock."""
+        self.transitions[f"{self._state}->{state}"] += 1
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self._trials_in_flight = 0
+            self._trial_successes = 0
+        elif state == CLOSED:
+            self._calls.clear()
+
+    # ============ Call Accounting ============
+
+    def allow(self, trial: bool = True):
+        """
+        Reserve permission for one upstream call.
+
+        Args:
+            trial: Whether the call may be one of the half-open trial calls;
+                pass False for optional work that should only run while closed
+
+        Raises:
+            CircuitOpenError: If the circuit is open or all trial slots are taken
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == OPEN:
+                self.counters["short_circuited"] += 1
+                raise CircuitOpenError(self.open_seconds - (time.monotonic() - self._opened_at))
+            if self._state == HALF_OPEN:
+                if not trial:
+                    self.counters["short_circuited"] += 1
+                    raise CircuitOpenError(0)
+                if self._trials_in_flight >= self.half_open_max_calls:
+                    self.counters["short_circuited"] += 1
+                    raise CircuitOpenError(0)
+                self._trials_in_flight += 1
+            self.counters["calls"] += 1
+
+    def record_success(self, latency: float, budget: Optional[float] = None):
+        """Record a completed upstream call, its latency and latency budget in seconds."""
+        self._record(True, latency, budget)
+
+    def record_failure(self, latency: float, budget: Optional[float] = None):
+        """Record a failed upstream call."""
+        self._record(False, latency, budget)
+
+    def _record(self, ok: bool, latency: float, budget: Optional[float]):
+        """Update the window or trial state with one call outcome."""
+        with self._lock:
+            self.counters["successes" if ok else "failures"] += 1
+            if self._state == HALF_OPEN:
+                self._trials_in_flight = max(self._trials_in_flight - 1, 0)
+                if not ok:
+                    self._transition(OPEN)
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.half_open_successes:
+                        self._transition(CLOSED)
+                return
+            if self._state == OPEN:
+                # A call admitted before the circuit opened
+                return
+
+            # Latency is kept as a share of the call's budget; above 1.0 is slow
+            self._calls.append((ok, latency / (budget or self.latency_threshold)))
+            if len(self._calls) >= self.min_calls and self._should_open():
+                self._transition(OPEN)
+
+    def _should_open(self) -> bool:
+        """Check the rolling window against both thresholds; caller holds the lock."""
+        if self._error_rate() >= self.error_rate_threshold:
+            return True
+        # A high percentile of a handful of calls is just the slowest call
+        return len(self._calls) >= self.min_latency_samples and self._latency_quantile() > 1.0
+
+    def _error_rate(self) -> float:
+        """Share of failed calls in the window; caller holds the lock."""
+        if not self._calls:
+            return 0.0
+        return sum(1 for ok, _ in self._calls if not ok) / len(self._calls)
+
+    def _latency_quantile(self) -> float:
+        """Nearest-rank latency percentile of the window, as a share of budget; caller holds the lock."""
+        if not self._calls:
+            return 0.0
+        latencies = sorted(latency for _, latency in self._calls)
+        rank = math.ceil(len(latencies) * self.latency_percentile / 100)
+        return latencies[min(max(rank, 1), len(latencies)) - 1]
+
+    # ============ Metrics ============
+
+    def get_stats(self) -> Dict[str, object]:
+        """Get state, window statistics, call counters and transition counts."""
+        with self._lock:
+            self._refresh()
+            retry_after: Optional[float] = None
+            if self._state == OPEN:
+                retry_after = round(self.open_seconds - (time.monotonic() - self._opened_at), 1)
+            return {
+                "state": self._state,
+                "retry_after_s": retry_after,
+                "window_calls": len(self._calls),
+                "error_rate": round(self._error_rate(), 3),
+                f"p{self.latency_percentile:g}_latency_budget_ratio": round(self._latency_quantile(), 3),
+                "counters": dict(self.counters),
+                "transitions": dict(self.transitions),
+            }
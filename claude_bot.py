@@ -4,28 +4,91 @@ Integrates Anthropic's Claude 3.5 API with developer portfolio metadata
 """
 
 import os
+import sys
 import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
 from pathlib import Path
-from typing import Optional, Iterator
+from typing import TYPE_CHECKING, Optional, Iterator, Tuple
 import anthropic
 
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from github_profile_bot import GitHubProfileBot
+from profiles import GenerationProfile, ProfileRouter
+from profiling import span
+from session_store import SQLiteSessionStore
+
+if TYPE_CHECKING:
+    from prefetch import FollowUpPrefetcher
+
+
+def _is_upstream_failure(error: Exception) -> bool:
+    """Check whether an error means the upstream API is unhealthy."""
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code >= 500 or error.status_code == 429
+    # Connection errors and timeouts
+    return isinstance(error, anthropic.APIConnectionError)
+
+
+def is_degradable(error: Exception) -> bool:
+    """
+    Check whether callers should answer in degraded mode (see degraded_answer).
+
+    Only an open circuit or an upstream outage qualifies; request errors such
+    as a bad API key or an invalid request still surface as errors.
+    """
+    return isinstance(error, CircuitOpenError) or _is_upstream_failure(error)
+
 
 class ClaudePortfolioBot:
     """AI chatbot powered by Claude 3.5 for portfolio inquiries."""
     
-    def __init__(self, portfolio_data_path: str = "portfolio_data.json", api_key: Optional[str] = None):
-        """Initialize Claude bot with portfolio data and API key."""
+    def __init__(
+        self,
+        portfolio_data_path: str = "portfolio_data.json",
+        api_key: Optional[str] = None,
+        session_store: Optional[SQLiteSessionStore] = None,
+        history_turns: int = 20,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Initialize Claude bot with portfolio data and API key.
+        
+        Args:
+            portfolio_data_path: Path to the portfolio JSON file
+            api_key: Anthropic API key (defaults to ANTHROPIC_API_KEY)
+            session_store: Durable store for per-session history; when omitted,
+                history lives in this process only
+            history_turns: Number of most recent turns sent upstream per session
+            breaker: Circuit breaker guarding every upstream call
+        """
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError(
                 "ANTHROPIC_API_KEY not found. Set it as environment variable or pass as argument."
             )
         
-        self.client = anthropic.Anthropic(api_key=self.api_key)
-        self.model = "claude-3-5-sonnet-20241022"
+        # Bounded timeout so an upstream outage fails fast into the breaker
+        self.client = anthropic.Anthropic(
+            api_key=self.api_key,
+            timeout=float(os.getenv("ANTHROPIC_TIMEOUT", "60")),
+        )
+        self.breaker = breaker or CircuitBreaker()
+        self.portfolio_data_path = portfolio_data_path
         self.portfolio_data = self._load_portfolio_data(portfolio_data_path)
         self.system_prompt = self._build_system_prompt()
+        # The local intent matcher picks model tier and limits per query
+        self.classifier = GitHubProfileBot(portfolio_data_path=portfolio_data_path)
+        self.router = ProfileRouter(self.classifier)
         self.conversation_history = []
+        self.session_store = session_store
+        self.history_turns = history_turns
+        self.prefetcher = None
+        self._answer_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._answer_cache_size = 512
+        self._answer_cache_lock = threading.Lock()
     
     def _load_portfolio_data(self, path: str) -> dict:
         """Load portfolio data from JSON file."""
@@ -114,73 +177,267 @@ TONE: Professional but friendly, mentor-style, encouraging, knowledgeable."""
         
         return system_prompt
     
-    def chat(self, user_message: str, stream: bool = False) -> str | Iterator[str]:
+    def chat(self, user_message: str, stream: bool = False, session_id: Optional[str] = None) -> str | Iterator[str]:
         """
         Send a message and get a response from Claude.
         
         Args:
             user_message: User's question or message
             stream: Whether to stream the response
+            session_id: Conversation to continue from the session store;
+                uses the in-process history when omitted
             
         Returns:
             Response text or iterator of response chunks if streaming
         """
-        # Add user message to history
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
+        user_turn = {"role": "user", "content": user_message}
+        
+        if self._uses_store(session_id):
+            with span("history_load"):
+                messages = self._session_messages(session_id) + [user_turn]
+        else:
+            # Add user message to history
+            self.conversation_history.append(user_turn)
+            messages = self.conversation_history
+        
+        if self.prefetcher:
+            with span("prefetch_lookup"):
+                prefetched = self.prefetcher.lookup(user_message, session_id)
+            if prefetched is not None:
+                self._record_response(messages, prefetched, session_id)
+                return iter([prefetched]) if stream else prefetched
         
         if stream:
-            return self._stream_response()
+            return self._stream_response(messages, session_id)
         else:
-            return self._get_response()
+            return self._get_response(messages, session_id)
+    
+    def _uses_store(self, session_id: Optional[str]) -> bool:
+        """Check whether a conversation is backed by the session store."""
+        return bool(session_id) and self.session_store is not None
+    
+    def _session_messages(self, session_id: str) -> list:
+        """Load the most recent turns of a stored session."""
+        messages = self.session_store.recent_turns(session_id, self.history_turns)
+        # The API requires the conversation to open with a user turn
+        while messages and messages[0]["role"] != "user":
+            messages.pop(0)
+        return messages
+    
+    def _record_response(self, messages: list, assistant_message: str, session_id: Optional[str]):
+        """Persist a completed exchange to wherever the conversation lives."""
+        user_message = messages[-1]["content"]
+        
+        with span("history_write"):
+            if self._uses_store(session_id):
+                self.session_store.append(session_id, "user", user_message)
+                self.session_store.append(session_id, "assistant", assistant_message)
+            else:
+                self.conversation_history.append({
+                    "role": "assistant",
+                    "content": assistant_message
+                })
+        
+        # Only answers given without prior turns are safe to reuse for other
+        # sessions; "what did I just tell you?" depends on whose history it saw
+        if len(messages) == 1:
+            self._remember_answer(user_message, assistant_message)
+        
+        if self.prefetcher:
+            with span("prefetch_schedule"):
+                self.prefetcher.observe(user_message, session_id)
+    
+    def _remember_answer(self, query: str, answer: str):
+        """Keep recent history-free answers so degraded mode can reuse them."""
+        key = query.strip().lower()
+        with self._answer_cache_lock:
+            self._answer_cache[key] = answer
+            self._answer_cache.move_to_end(key)
+            while len(self._answer_cache) > self._answer_cache_size:
+                self._answer_cache.popitem(last=False)
+    
+    def degraded_answer(self, query: str) -> str:
+        """
+        Answer without calling upstream, for use while the circuit is open.
+        
+        Returns:
+            A cached Claude answer to the same question, given without
+            conversation history, if there is one; otherwise the rule-based
+            bot's answer
+        """
+        with self._answer_cache_lock:
+            cached = self._answer_cache.get(query.strip().lower())
+        if cached is not None:
+            return cached
+        return self.classifier.answer_query(query)
+    
+    def _guarded(self, call, profile: GenerationProfile, trial: bool = True):
+        """Run an upstream call through the circuit breaker, timed against the profile's budget."""
+        self.breaker.allow(trial)
+        started = time.perf_counter()
+        try:
+            result = call()
+        except Exception as e:
+            self._record_upstream_error(e, time.perf_counter() - started, profile)
+            raise
+        self.breaker.record_success(time.perf_counter() - started, profile.latency_budget)
+        return result
+    
+    def _record_upstream_error(self, error: Exception, latency: float, profile: GenerationProfile):
+        """Count an upstream error against the breaker if it signals an outage."""
+        if _is_upstream_failure(error):
+            self.breaker.record_failure(latency, profile.latency_budget)
+        else:
+            self.breaker.record_success(latency, profile.latency_budget)
+    
+    def _request_args(self, messages: list, profile: GenerationProfile) -> dict:
+        """Build messages API arguments for a generation profile."""
+        args = {
+            "model": profile.model,
+            "max_tokens": profile.max_tokens,
+            "temperature": profile.temperature,
+            "system": self.system_prompt,
+            "messages": messages,
+        }
+        if profile.stop_sequences:
+            args["stop_sequences"] = list(profile.stop_sequences)
+        return args
+    
+    def _create(self, messages: list, profile: GenerationProfile, speculative: bool = False):
+        """
+        Call Claude with a profile, escalating to a larger tier if the quality check fails.
+        
+        Args:
+            speculative: Prefetch work, which never probes a half-open circuit
+                (see CircuitBreaker.allow) and is left out of the per-profile
+                metrics; the prefetcher accounts for its own tokens
+        """
+        while True:
+            with span("prompt_assembly"):
+                args = self._request_args(messages, profile)
+            started = time.perf_counter()
+            with span("upstream"):
+                response = self._guarded(lambda: self.client.messages.create(**args), profile, trial=not speculative)
+            escalation = self.router.escalation_for(profile, response.content[0].text, response.stop_reason)
+            if not speculative:
+                self.router.record(
+                    profile,
+                    time.perf_counter() - started,
+                    response.usage.input_tokens,
+                    response.usage.output_tokens,
+                    escalated=escalation is not None,
+                )
+            if escalation is None:
+                return response
+            profile = escalation
     
-    def _get_response(self) -> str:
+    def _ask(self, prompt: str, profile_name: str) -> str:
+        """Send a standalone prompt with a named profile."""
+        response = self._create([{"role": "user", "content": prompt}], self.router.get(profile_name))
+        return response.content[0].text
+    
+    def _get_response(self, messages: list, session_id: Optional[str] = None) -> str:
         """Get non-streaming response from Claude."""
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2048,
-            system=self.system_prompt,
-            messages=self.conversation_history
-        )
+        with span("classify"):
+            profile = self.router.select(messages[-1]["content"])
+        response = self._create(messages, profile)
         
         assistant_message = response.content[0].text
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": assistant_message
-        })
+        self._record_response(messages, assistant_message, session_id)
         
         return assistant_message
     
-    def _stream_response(self) -> Iterator[str]:
+    def _stream_response(self, messages: list, session_id: Optional[str] = None) -> Iterator[str]:
         """Get streaming response from Claude."""
+        # Text is already on its way to the user, so streams are never escalated
+        with span("classify"):
+            profile = self.router.select(messages[-1]["content"])
+        with span("prompt_assembly"):
+            args = self._request_args(messages, profile)
         full_response = ""
         
-        with self.client.messages.stream(
-            model=self.model,
-            max_tokens=2048,
-            system=self.system_prompt,
-            messages=self.conversation_history
-        ) as stream:
-            for text in stream.text_stream:
-                full_response += text
-                yield text
+        self.breaker.allow()
+        started = time.perf_counter()
+        outcome_recorded = False
+        try:
+            with span("upstream"), self.client.messages.stream(**args) as stream:
+                for text in stream.text_stream:
+                    full_response += text
+                    yield text
+                usage = stream.get_final_message().usage
+        except Exception as e:
+            outcome_recorded = True
+            self._record_upstream_error(e, time.perf_counter() - started, profile)
+            raise
+        finally:
+            if not outcome_recorded:
+                # Completed, or abandoned by the consumer mid-stream; timed
+                # end to end against the profile budget like non-streaming calls
+                self.breaker.record_success(time.perf_counter() - started, profile.latency_budget)
+        
+        self.router.record(profile, time.perf_counter() - started, usage.input_tokens, usage.output_tokens)
         
         # Add complete response to history
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": full_response
-        })
+        self._record_response(messages, full_response, session_id)
+    
+    def answer_once(self, query: str) -> Tuple[str, dict]:
+        """
+        Answer a single query without reading or writing conversation history.
+        
+        Returns:
+            Response text and token usage
+        """
+        with span("classify"):
+            profile = self.router.select(query)
+        response = self._create([{"role": "user", "content": query}], profile)
+        usage = {
+            "model": response.model,
+            "input_tokens": response.usage.input_tokens,
+            "output_tokens": response.usage.output_tokens,
+        }
+        self._remember_answer(query, response.content[0].text)
+        return response.content[0].text, usage
     
-    def reset_conversation(self):
+    def reset_conversation(self, session_id: Optional[str] = None):
         """Clear conversation history to start fresh."""
-        self.conversation_history = []
+        if self._uses_store(session_id):
+            self.session_store.delete_session(session_id)
+        else:
+            self.conversation_history = []
     
-    def get_conversation_history(self) -> list:
+    def get_conversation_history(self, session_id: Optional[str] = None) -> list:
         """Get the current conversation history."""
+        if self._uses_store(session_id):
+            return self.session_store.recent_turns(session_id, self.history_turns)
         return self.conversation_history.copy()
     
+    def enable_prefetch(self, **options) -> "FollowUpPrefetcher":
+        """
+        Speculatively generate likely follow-up answers after each response.
+        
+        Args:
+            **options: Passed to FollowUpPrefetcher (top_k, ttl, max_tokens,
+                token_budget, ...)
+            
+        Returns:
+            The prefetcher, whose get_stats() reports hit rate and wasted tokens
+        """
+        from prefetch import FollowUpPrefetcher
+        
+        # The system prompt is sent with every prefetch, so reserve it too
+        options.setdefault("input_tokens", len(self.system_prompt) // 4)
+        self.prefetcher = FollowUpPrefetcher(self._prefetch_generate, self.classifier, **options)
+        return self.prefetcher
+    
+    def _prefetch_generate(self, prompt: str, max_tokens: int) -> Tuple[str, int]:
+        """Generate a standalone answer for the prefetcher, with tokens spent."""
+        profile = self.router.select(prompt)
+        # Speculative work stays within its budget: capped and never escalated
+        profile = replace(profile, max_tokens=min(profile.max_tokens, max_tokens), escalate_to=None)
+        response = self._create([{"role": "user", "content": prompt}], profile, speculative=True)
+        tokens = response.usage.input_tokens + response.usage.output_tokens
+        return response.content[0].text, tokens
+    
     def generate_code_example(self, topic: str, language: str = "python") -> str:
         """
         Generate a code example for a specific topic.
@@ -193,35 +450,17 @@ TONE: Professional but friendly, mentor-style, encouraging, knowledgeable."""
             Code example as string
         """
         prompt = f"Generate a {language} code example for: {topic}. Make it production-ready and well-documented."
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2048,
-            system=self.system_prompt,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return self._ask(prompt, "code")
     
     def get_project_summary(self, project_name: str) -> str:
         """Get a detailed summary of a specific project."""
         prompt = f"Provide a detailed summary of the {project_name} project including its purpose, tech stack, key features, and what was learned."
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1024,
-            system=self.system_prompt,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return self._ask(prompt, "project")
     
     def get_recruiter_pitch(self) -> str:
         """Generate a professional recruiter pitch."""
         prompt = "Generate a compelling 2-3 paragraph pitch for a recruiter explaining my background, skills, and what makes me a great fit for a team."
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=512,
-            system=self.system_prompt,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return self._ask(prompt, "pitch")
     
     def explain_concept(self, concept: str, level: str = "intermediate") -> str:
         """
@@ -235,17 +474,41 @@ TONE: Professional but friendly, mentor-style, encouraging, knowledgeable."""
             Explanation of the concept
         """
         prompt = f"Explain the concept '{concept}' at a {level} level, with examples if relevant."
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1024,
-            system=self.system_prompt,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return self._ask(prompt, "concept")
+
+
+# Attempts per batch query while upstream is failing or the circuit is open
+BATCH_MAX_ATTEMPTS = 8
+
+
+def _batch_answer():
+    """Build a history-free answer function for batch mode."""
+    bot = ClaudePortfolioBot()
+    
+    def answer(query: str) -> Tuple[str, dict]:
+        # Back off through outages instead of failing the rest of the run
+        # the moment the circuit opens
+        delay = 1.0
+        for attempt in range(1, BATCH_MAX_ATTEMPTS + 1):
+            try:
+                return bot.answer_once(query)
+            except Exception as e:
+                if attempt == BATCH_MAX_ATTEMPTS or not is_degradable(e):
+                    raise
+                wait = max(getattr(e, "retry_after", 0.0), delay)
+            time.sleep(wait)
+            delay = min(delay * 2, 30.0)
+    
+    return answer
 
 
 def main():
     """Interactive CLI for Claude Portfolio Bot."""
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        import batch
+        batch.main(sys.argv[2:], "claude_bot.py", _batch_answer)
+        return
+    
     print("=" * 60)
     print("Welcome to Claude-Powered GitHub Portfolio Bot!")
     print("=" * 60)
@@ -283,6 +546,9 @@ def main():
             for chunk in bot.chat(user_input, stream=True):
                 print(chunk, end="", flush=True)
             print("\n")
+        except CircuitOpenError:
+            # Upstream is down; answer from cache or the rule-based bot
+            print(f"{bot.degraded_answer(user_input)}\n")
         except anthropic.APIError as e:
             print(f"\nError: API request failed - {e}\n")
 
@@ -1,7 +1,88 @@
 import json
 import re
+import sys
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Pattern, Tuple
+
+
+# Intent rules in priority order: (intent, argument, trigger keywords).
+# The first rule with a keyword contained in the query wins.
+INTENT_RULES: List[Tuple[str, Optional[str], List[str]]] = [
+    ("about", None, ["about", "who are you", "tell me about yourself", "introduce"]),
+    ("skills", None, ["skills", "technologies", "tech"]),
+    ("expertise", None, ["expertise", "specialization", "strong at"]),
+    ("projects", None, ["all projects", "portfolio", "what have you built"]),
+    ("project_details", "SmartLeaf", ["smartleaf", "plant", "disease"]),
+    ("project_details", "BreatheEasy", ["breatheasy", "pollution", "air quality", "health"]),
+    ("project_details", "Student Management System", ["student", "management", "school"]),
+    ("project_details", "Movie Recommendation System", ["movie", "recommendation", "sentiment"]),
+    ("project_details", "Smart Grocery AI", ["grocery", "shopping", "smart"]),
+    ("tech_stack", None, ["tech stack", "used in", "built with"]),
+    ("improvement", None, ["improve", "improvement", "better", "enhance"]),
+    ("new_projects", None, ["new project", "project ideas", "what should i build"]),
+    ("roadmap", None, ["learning", "roadmap", "improve skills"]),
+    ("career", None, ["career", "interests", "what roles"]),
+    ("recruiter", None, ["recruiter", "hiring", "job", "interview", "pitch"]),
+    ("ai_ml", None, ["ai/ml", "ai specialist", "ml engineer"]),
+    ("fullstack", None, ["fullstack", "full-stack", "backend", "frontend"]),
+]
+
+# Roadmap focus refinement for the "roadmap" intent, in priority order
+ROADMAP_FOCUS_RULES: List[Tuple[str, List[str]]] = [
+    ("ml", ["machine learning", "ml", "ai"]),
+    ("nlp", ["nlp", "language"]),
+    ("fullstack", ["fullstack", "full-stack", "web"]),
+]
+
+UNKNOWN_INTENT = "unknown"
+
+ROADMAP_FOCUSES = ["ml", "nlp", "fullstack", "general"]
+
+PROJECT_IMPROVEMENTS: Dict[str, List[str]] = {
+    "SmartLeaf": [
+        "Add model explainability using SHAP or LIME",
+        "Implement mobile app for easier access",
+        "Create API for integration with agriculture platforms",
+        "Add multi-language support for global farmers"
+    ],
+    "BreatheEasy": [
+        "Implement real-time notifications for pollution spikes",
+        "Add historical data visualization and trend analysis",
+        "Integrate with wearable devices for health metrics",
+        "Create a mobile app for on-the-go monitoring"
+    ],
+    "Student Management System": [
+        "Add automated email notifications for alerts",
+        "Implement parent portal for progress tracking",
+        "Create export functionality (PDF reports)",
+        "Add advanced analytics and predictive insights"
+    ],
+    "Movie Recommendation System": [
+        "Integrate with real streaming APIs (TMDB, IMDb)",
+        "Add social features (friend recommendations, ratings)",
+        "Implement A/B testing for algorithm optimization",
+        "Create visualization of recommendation reasoning"
+    ],
+    "Smart Grocery AI": [
+        "Add price comparison across multiple stores",
+        "Implement barcode scanning for quick shopping",
+        "Create loyalty program integration",
+        "Add nutritional analysis and dietary preferences"
+    ]
+}
+
+DEFAULT_IMPROVEMENTS = [
+    "Write comprehensive documentation",
+    "Add automated testing",
+    "Deploy to cloud platform",
+    "Create CI/CD pipeline"
+]
+
+
+def word_pattern(keywords: List[str]) -> Pattern:
+    """Compile keywords into one regex matching any of them as whole words."""
+    return re.compile(r"\b(?:" + "|".join(re.escape(word) for word in keywords) + r")\b")
+
 
 class GitHubProfileBot:
     """
@@ -11,11 +92,21 @@ class GitHubProfileBot:
     
     def __init__(self, portfolio_data_path: str = "portfolio_data.json"):
         """Initialize the bot with portfolio data."""
-        self.portfolio_data = self._load_portfolio_data(portfolio_data_path)
+        self.portfolio_data_path = portfolio_data_path
+        self.set_portfolio_data(self._load_portfolio_data(portfolio_data_path))
+    
+    def set_portfolio_data(self, portfolio_data: Dict):
+        """Replace the portfolio and re-render every precomputed answer."""
+        self.portfolio_data = portfolio_data
         self.developer = self.portfolio_data.get("developer", {})
         self.skills = self.portfolio_data.get("skills", {})
         self.projects = {p["id"]: p for p in self.portfolio_data.get("projects", [])}
         self.experience = self.portfolio_data.get("experience", {})
+        self._answers = self._build_answer_table()
+    
+    def reload(self):
+        """Re-read the portfolio file, e.g. after it has been edited."""
+        self.set_portfolio_data(self._load_portfolio_data(self.portfolio_data_path))
     
     def _load_portfolio_data(self, path: str) -> Dict:
         """Load portfolio data from JSON file."""
@@ -43,13 +134,11 @@ class GitHubProfileBot:
         if not self.skills:
             return "I don't have skills information available."
         
-        summary = "**Technical Skills:**\n\n"
-        for category, tech_list in self.skills.items():
-            if isinstance(tech_list, list) and tech_list:
-                formatted_category = category.replace('_', ' ').title()
-                summary += f"**{formatted_category}:** {', '.join(tech_list)}\n"
-        
-        return summary
+        return "**Technical Skills:**\n\n" + "".join(
+            f"**{category.replace('_', ' ').title()}:** {', '.join(tech_list)}\n"
+            for category, tech_list in self.skills.items()
+            if isinstance(tech_list, list) and tech_list
+        )
     
     def get_expertise_areas(self) -> str:
         """List areas of expertise."""
@@ -66,12 +155,10 @@ class GitHubProfileBot:
         if not self.projects:
             return "No projects found."
         
-        projects_list = "**Portfolio Projects:**\n\n"
-        for project_id in sorted(self.projects.keys()):
-            p = self.projects[project_id]
-            projects_list += f"{project_id}. **{p.get('name', 'Unknown')}** – {p.get('subtitle', '')}\n"
-        
-        return projects_list
+        return "**Portfolio Projects:**\n\n" + "".join(
+            f"{project_id}. **{p.get('name', 'Unknown')}** – {p.get('subtitle', '')}\n"
+            for project_id, p in sorted(self.projects.items())
+        )
     
     def get_project_details(self, project_name: str) -> str:
         """Get detailed information about a specific project."""
@@ -79,32 +166,31 @@ class GitHubProfileBot:
         if not project:
             return f"I don't have information about a project called '{project_name}'."
         
-        details = (
-            f"**{project.get('name', 'Unknown')}**\n\n"
-            f"*{project.get('subtitle', '')}*\n\n"
-            f"**Type:** {project.get('type', 'N/A')}\n\n"
-            f"**Description:** {project.get('description', 'N/A')}\n\n"
-        )
+        parts = [
+            f"**{project.get('name', 'Unknown')}**\n\n",
+            f"*{project.get('subtitle', '')}*\n\n",
+            f"**Type:** {project.get('type', 'N/A')}\n\n",
+            f"**Description:** {project.get('description', 'N/A')}\n\n",
+        ]
         
         # Tech Stack
         tech = project.get("tech_stack", [])
         if tech:
-            details += f"**Tech Stack:** {', '.join(tech)}\n\n"
+            parts.append(f"**Tech Stack:** {', '.join(tech)}\n\n")
         
         # Features
         features = project.get("features", [])
         if features:
-            details += "**Key Features:**\n"
-            for feature in features:
-                details += f"• {feature}\n"
-            details += "\n"
+            parts.append("**Key Features:**\n")
+            parts.extend(f"• {feature}\n" for feature in features)
+            parts.append("\n")
         
         # Impact & Learning
-        details += f"**Impact:** {project.get('impact', 'N/A')}\n\n"
-        details += f"**Key Learning:** {project.get('key_learning', 'N/A')}\n\n"
-        details += f"**Status:** {project.get('status', 'N/A')}"
+        parts.append(f"**Impact:** {project.get('impact', 'N/A')}\n\n")
+        parts.append(f"**Key Learning:** {project.get('key_learning', 'N/A')}\n\n")
+        parts.append(f"**Status:** {project.get('status', 'N/A')}")
         
-        return details
+        return "".join(parts)
     
     def _find_project(self, name: str) -> Optional[Dict]:
         """Find a project by name (case-insensitive)."""
@@ -149,54 +235,10 @@ class GitHubProfileBot:
         if not project:
             return f"I don't have information about '{project_name}'."
         
-        suggestions = f"**Improvement Suggestions for {project.get('name', 'this project')}:**\n\n"
-        
-        improvements = {
-            "SmartLeaf": [
-                "Add model explainability using SHAP or LIME",
-                "Implement mobile app for easier access",
-                "Create API for integration with agriculture platforms",
-                "Add multi-language support for global farmers"
-            ],
-            "BreatheEasy": [
-                "Implement real-time notifications for pollution spikes",
-                "Add historical data visualization and trend analysis",
-                "Integrate with wearable devices for health metrics",
-                "Create a mobile app for on-the-go monitoring"
-            ],
-            "Student Management System": [
-                "Add automated email notifications for alerts",
-                "Implement parent portal for progress tracking",
-                "Create export functionality (PDF reports)",
-                "Add advanced analytics and predictive insights"
-            ],
-            "Movie Recommendation System": [
-                "Integrate with real streaming APIs (TMDB, IMDb)",
-                "Add social features (friend recommendations, ratings)",
-                "Implement A/B testing for algorithm optimization",
-                "Create visualization of recommendation reasoning"
-            ],
-            "Smart Grocery AI": [
-                "Add price comparison across multiple stores",
-                "Implement barcode scanning for quick shopping",
-                "Create loyalty program integration",
-                "Add nutritional analysis and dietary preferences"
-            ]
-        }
-        
-        project_key = project.get("name")
-        default_improvements = [
-            "Write comprehensive documentation",
-            "Add automated testing",
-            "Deploy to cloud platform",
-            "Create CI/CD pipeline"
-        ]
-        
-        items = improvements.get(project_key, default_improvements)
-        for i, suggestion in enumerate(items, 1):
-            suggestions += f"{i}. {suggestion}\n"
-        
-        return suggestions
+        items = PROJECT_IMPROVEMENTS.get(project.get("name"), DEFAULT_IMPROVEMENTS)
+        return f"**Improvement Suggestions for {project.get('name', 'this project')}:**\n\n" + "".join(
+            f"{i}. {suggestion}\n" for i, suggestion in enumerate(items, 1)
+        )
     
     def suggest_new_projects(self) -> str:
         """Suggest new project ideas based on existing skills."""
@@ -271,18 +313,14 @@ class GitHubProfileBot:
         if not interests:
             return "I don't have career interest information."
         
-        summary = "**Career Interests:**\n\n"
-        for interest in interests:
-            summary += f"• {interest}\n"
-        
-        summary += (
-            "\n**Why these paths?**\n\n"
+        return (
+            "**Career Interests:**\n\n"
+            + "".join(f"• {interest}\n" for interest in interests)
+            + "\n**Why these paths?**\n\n"
             "These roles combine your strengths in ML, data science, and full-stack development. "
             "You can specialize in any direction based on your interests and the projects demonstrate "
             "readiness for professional roles."
         )
-        
-        return summary
     
     # ============ Recruiter-Specific Questions ============
     
@@ -345,79 +383,69 @@ class GitHubProfileBot:
     
     # ============ Main Query Handler ============
     
-    def answer_query(self, query: str) -> str:
-        """Process user query and return appropriate answer."""
+    def classify_intent(self, query: str) -> Tuple[str, Optional[str]]:
+        """
+        Detect the intent of a query without rendering an answer.
+        
+        Returns:
+            (intent, argument) where argument is a project name or roadmap
+            focus for intents that take one, otherwise None
+        """
         query_lower = query.lower()
         
-        # Intent detection
-        if any(word in query_lower for word in ["about", "who are you", "tell me about yourself", "introduce"]):
+        for intent, arg, keywords in INTENT_RULES:
+            if not any(word in query_lower for word in keywords):
+                continue
+            
+            if intent in ("tech_stack", "improvement"):
+                # Try to extract project name
+                for project in self.projects.values():
+                    if project.get("name").lower() in query_lower:
+                        return intent, project.get("name")
+                return intent, None
+            
+            if intent == "roadmap":
+                for focus, focus_keywords in ROADMAP_FOCUS_RULES:
+                    if any(word in query_lower for word in focus_keywords):
+                        return intent, focus
+                return intent, "general"
+            
+            return intent, arg
+        
+        return UNKNOWN_INTENT, None
+    
+    def render_intent(self, intent: str, arg: Optional[str] = None) -> str:
+        """Render the answer for an intent returned by classify_intent."""
+        if intent == "about":
             return self.about_developer()
-        
-        elif any(word in query_lower for word in ["skills", "technologies", "tech"]):
+        elif intent == "skills":
             return self.get_skills_summary()
-        
-        elif any(word in query_lower for word in ["expertise", "specialization", "strong at"]):
+        elif intent == "expertise":
             return self.get_expertise_areas()
-        
-        elif any(word in query_lower for word in ["all projects", "portfolio", "what have you built"]):
+        elif intent == "projects":
             return self.list_all_projects()
-        
-        elif any(word in query_lower for word in ["smartleaf", "plant", "disease"]):
-            return self.get_project_details("SmartLeaf")
-        
-        elif any(word in query_lower for word in ["breatheasy", "pollution", "air quality", "health"]):
-            return self.get_project_details("BreatheEasy")
-        
-        elif any(word in query_lower for word in ["student", "management", "school"]):
-            return self.get_project_details("Student Management System")
-        
-        elif any(word in query_lower for word in ["movie", "recommendation", "sentiment"]):
-            return self.get_project_details("Movie Recommendation System")
-        
-        elif any(word in query_lower for word in ["grocery", "shopping", "smart"]):
-            return self.get_project_details("Smart Grocery AI")
-        
-        elif any(word in query_lower for word in ["tech stack", "used in", "built with"]):
-            # Try to extract project name
-            projects_list = list(self.projects.values())
-            for project in projects_list:
-                if project.get("name").lower() in query_lower:
-                    return self.get_project_tech_stack(project.get("name"))
+        elif intent == "project_details":
+            return self.get_project_details(arg)
+        elif intent == "tech_stack":
+            if arg:
+                return self.get_project_tech_stack(arg)
             return "Please specify which project you'd like to know about."
-        
-        elif any(word in query_lower for word in ["improve", "improvement", "better", "enhance"]):
-            # Extract project name
-            projects_list = list(self.projects.values())
-            for project in projects_list:
-                if project.get("name").lower() in query_lower:
-                    return self.suggest_project_improvement(project.get("name"))
+        elif intent == "improvement":
+            if arg:
+                return self.suggest_project_improvement(arg)
             return "Please specify which project you'd like suggestions for."
-        
-        elif any(word in query_lower for word in ["new project", "project ideas", "what should i build"]):
+        elif intent == "new_projects":
             return self.suggest_new_projects()
-        
-        elif any(word in query_lower for word in ["learning", "roadmap", "improve skills"]):
-            if any(word in query_lower for word in ["machine learning", "ml", "ai"]):
-                return self.learning_roadmap("ml")
-            elif any(word in query_lower for word in ["nlp", "language"]):
-                return self.learning_roadmap("nlp")
-            elif any(word in query_lower for word in ["fullstack", "full-stack", "web"]):
-                return self.learning_roadmap("fullstack")
-            else:
-                return self.learning_roadmap()
-        
-        elif any(word in query_lower for word in ["career", "interests", "what roles"]):
+        elif intent == "roadmap":
+            return self.learning_roadmap(arg or "general")
+        elif intent == "career":
             return self.career_interests()
-        
-        elif any(word in query_lower for word in ["recruiter", "hiring", "job", "interview", "pitch"]):
+        elif intent == "recruiter":
             return self.pitch_to_recruiter()
-        
-        elif any(word in query_lower for word in ["ai/ml", "ai specialist", "ml engineer"]):
+        elif intent == "ai_ml":
             return self.ai_ml_specialist()
-        
-        elif any(word in query_lower for word in ["fullstack", "full-stack", "backend", "frontend"]):
+        elif intent == "fullstack":
             return self.fullstack_developer_profile()
-        
         else:
             return (
                 "I'm not sure how to answer that. Try asking me about:\n\n"
@@ -429,10 +457,42 @@ class GitHubProfileBot:
                 "• AI/ML or Full-Stack expertise\n\n"
                 "Feel free to rephrase your question!"
             )
+    
+    def _build_answer_table(self) -> Dict[Tuple[str, Optional[str]], str]:
+        """Render the answer for every (intent, argument) classify_intent can return."""
+        keys: List[Tuple[str, Optional[str]]] = [(UNKNOWN_INTENT, None)]
+        for intent, arg, _ in INTENT_RULES:
+            if intent in ("tech_stack", "improvement"):
+                keys.append((intent, None))
+                keys.extend((intent, project.get("name")) for project in self.projects.values())
+            elif intent == "roadmap":
+                keys.extend((intent, focus) for focus in ROADMAP_FOCUSES)
+            else:
+                keys.append((intent, arg))
+        return {key: self.render_intent(*key) for key in keys}
+    
+    def answer_query(self, query: str) -> str:
+        """Process user query and return appropriate answer."""
+        key = self.classify_intent(query)
+        answer = self._answers.get(key)
+        if answer is None:
+            answer = self.render_intent(*key)
+        return answer
+
+
+def _batch_answer():
+    """Build an answer function for batch mode (no token usage)."""
+    bot = GitHubProfileBot()
+    return lambda query: (bot.answer_query(query), None)
 
 
 def main():
     """Main interactive loop for the bot."""
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        import batch
+        batch.main(sys.argv[2:], "github_profile_bot.py", _batch_answer)
+        return
+    
     print("=" * 60)
     print("Welcome to GitHubProfileBot!")
     print("=" * 60)
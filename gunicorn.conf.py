@@ -0,0 +1,60 @@
+"""
+Gunicorn configuration for running app.py with multiple worker processes.
+
+    PORTFOLIO_PRELOAD=1 gunicorn app:app
+
+With PORTFOLIO_PRELOAD=1 the app (portfolio data, system prompt and static
+payloads) is loaded once in the master and shared copy-on-write by workers.
+"""
+
+import gc
+import os
+import sys
+
+import prefork
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+threads = int(os.getenv("WORKER_THREADS", "4"))
+preload_app = os.getenv("PORTFOLIO_PRELOAD") == "1"
+
+# Seconds before the first per-worker memory report and between later ones
+memory_report_delay = float(os.getenv("MEMORY_REPORT_DELAY", "60"))
+memory_report_interval = float(os.getenv("MEMORY_REPORT_INTERVAL", "300"))
+
+# The config is loaded before the app is preloaded, so disabling the GC here
+# keeps the master from collecting (and fragmenting) the heap until it is
+# frozen in pre_fork
+if preload_app:
+    gc.disable()
+
+
+def pre_fork(server, worker):
+    """Freeze the master heap right before each worker is forked."""
+    if preload_app:
+        prefork.freeze_heap()
+
+
+def post_fork(server, worker):
+    """Turn the GC back on in the worker; frozen objects stay out of its reach."""
+    if preload_app:
+        gc.enable()
+
+
+def post_worker_init(worker):
+    """Log per-worker memory once warmed up so the preload saving can be checked."""
+    def log(report):
+        worker.log.info(
+            "worker %s memory: rss=%skB shared=%skB unique=%skB",
+            report["pid"], report.get("rss_kb"), report.get("shared_kb"), report.get("unique_kb"),
+        )
+
+    prefork.start_memory_reporter(log, delay=memory_report_delay, interval=memory_report_interval)
+
+
+def worker_exit(server, worker):
+    """Flush buffered conversation turns before the worker goes away."""
+    app_module = sys.modules.get("app")
+    store = getattr(app_module, "session_store", None)
+    if store is not None:
+        store.close()
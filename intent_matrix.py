@@ -0,0 +1,235 @@
+"""
+Vectorized Bulk Intent Classification
+Classify large query logs against GitHubProfileBot's intent rules with one
+sparse token lookup and NumPy matrix product per chunk, without rendering
+any answers
+"""
+
+import re
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from github_profile_bot import INTENT_RULES, UNKNOWN_INTENT
+
+
+def rule_label(intent: str, arg) -> str:
+    """Label for one intent rule, e.g. "skills" or "project_details:SmartLeaf"."""
+    return f"{intent}:{arg}" if arg else intent
+
+
+class BulkIntentClassifier:
+    """
+    Score every query in a chunk against every intent rule at once.
+
+    Each chunk is lowercased, deduplicated and split into words. Every
+    distinct word is resolved once through a word -> keyword-id vocabulary
+    that records the single-word keywords it contains as substrings, which
+    keeps the `keyword in query` semantics of answer_query ("tech" still
+    matches "technologies"). Two-word keywords are matched as bigrams: the
+    vocabulary also stores which keywords' first word ends the word and
+    which keywords' second word starts it, so a bigram test is one bitmask
+    AND per adjacent pair. The few longer phrases fall back to a plain
+    substring check. The hits fill a sparse binary query x keyword matrix,
+    multiplying by the keyword x rule matrix gives per-rule match counts,
+    and the first rule with any match wins, mirroring the priority order
+    of classify_intent.
+    Arguments that classify_intent resolves after matching (tech stack /
+    improvement project, roadmap focus) are not reported.
+
+    Queries are cut to `max_query_length` characters first, so one pasted
+    document cannot flood the chunk's text and vocabulary. Intent keywords
+    sit near the start of real queries, so keywords past the cut are
+    simply not seen. The vocabulary is dropped and rebuilt once it would
+    exceed `max_vocabulary` words.
+    """
+
+    def __init__(self, chunk_size: int = 65536, max_query_length: int = 1000, max_vocabulary: int = 1_000_000):
+        """Compile INTENT_RULES into the keyword vocabulary and rule matrix."""
+        self.chunk_size = chunk_size
+        self.max_query_length = max_query_length
+        self.max_vocabulary = max_vocabulary
+
+        self.labels: List[str] = [rule_label(intent, arg) for intent, arg, _ in INTENT_RULES] + [UNKNOWN_INTENT]
+        self.unknown_id = len(self.labels) - 1
+
+        keyword_columns: Dict[str, int] = {}
+        membership: List[Tuple[int, int]] = []
+        for rule_id, (_, _, keywords) in enumerate(INTENT_RULES):
+            for keyword in keywords:
+                column = keyword_columns.setdefault(keyword, len(keyword_columns))
+                membership.append((column, rule_id))
+
+        self.keywords = list(keyword_columns)
+        self.rule_matrix = np.zeros((len(self.keywords), len(INTENT_RULES)), dtype=np.float32)
+        for column, rule_id in membership:
+            self.rule_matrix[column, rule_id] = 1.0
+
+        self._word_keywords = [(column, k) for column, k in enumerate(self.keywords) if " " not in k]
+        self._bigram_keywords = [(column, k.split(" ")) for column, k in enumerate(self.keywords) if k.count(" ") == 1]
+        self._phrase_keywords = [(column, k) for column, k in enumerate(self.keywords) if k.count(" ") > 1]
+        self._word_lanes = -(-len(self._word_keywords) // 64)
+        self._bigram_lanes = -(-len(self._bigram_keywords) // 64)
+        # Regexes that find the few words (or queries) worth a full scan
+        self._any_word_keyword = self._alternation(k for _, k in self._word_keywords)
+        self._any_tail = self._alternation((first for _, (first, _) in self._bigram_keywords), "$", flags=re.MULTILINE)
+        self._any_head = self._alternation((second for _, (_, second) in self._bigram_keywords), "", "^", re.MULTILINE)
+        self._any_phrase = self._alternation(k for _, k in self._phrase_keywords)
+
+        # Word vocabulary shared across chunks: id per distinct word, and per
+        # id the single-word keywords it contains plus the bigram keywords
+        # whose first word it ends with (tails) or second word it starts with
+        # (heads), each as uint64 bitmask lanes
+        self._vocabulary: Dict[str, int] = {}
+        self._word_bits = np.zeros((0, self._word_lanes), dtype=np.uint64)
+        self._tail_bits = np.zeros((0, self._bigram_lanes), dtype=np.uint64)
+        self._head_bits = np.zeros((0, self._bigram_lanes), dtype=np.uint64)
+
+    @staticmethod
+    def _alternation(parts: Iterable[str], suffix: str = "", prefix: str = "", flags: int = 0):
+        """Compile a regex matching any of the given literal strings."""
+        parts = [re.escape(part) for part in parts]
+        if not parts:
+            return re.compile(r"(?!)")
+        return re.compile(prefix + "(?:" + "|".join(parts) + ")" + suffix, flags)
+
+    @staticmethod
+    def _matching_rows(pattern, lines: List[str]) -> List[int]:
+        """Indexes of the lines a pattern matches, found in one pass over the joined text."""
+        ends = np.cumsum(np.fromiter(map(len, lines), dtype=np.int64, count=len(lines)) + 1)
+        positions = [match.start() for match in pattern.finditer("\n".join(lines))]
+        return np.unique(np.searchsorted(ends, positions, side="right")).tolist()
+
+    @staticmethod
+    def _set_bit(lanes: np.ndarray, row: int, bit: int):
+        """Set one bit in a row of uint64 bitmask lanes."""
+        lanes[row, bit // 64] |= np.uint64(1 << (bit % 64))
+
+    def _add_words(self, words: List[str]):
+        """Add unseen words to the vocabulary, scanning each once."""
+        first_id = len(self._vocabulary)
+        self._vocabulary.update(zip(words, range(first_id, first_id + len(words))))
+        word_bits = np.zeros((len(words), self._word_lanes), dtype=np.uint64)
+        tail_bits = np.zeros((len(words), self._bigram_lanes), dtype=np.uint64)
+        head_bits = np.zeros((len(words), self._bigram_lanes), dtype=np.uint64)
+
+        # Most words hold no keyword; only the few that do are scanned in full
+        for row in self._matching_rows(self._any_word_keyword, words):
+            for bit, (_, keyword) in enumerate(self._word_keywords):
+                if keyword in words[row]:
+                    self._set_bit(word_bits, row, bit)
+        bigram_rows = set(self._matching_rows(self._any_tail, words))
+        bigram_rows.update(self._matching_rows(self._any_head, words))
+        for row in bigram_rows:
+            for bit, (_, (first, second)) in enumerate(self._bigram_keywords):
+                if words[row].endswith(first):
+                    self._set_bit(tail_bits, row, bit)
+                if words[row].startswith(second):
+                    self._set_bit(head_bits, row, bit)
+
+        self._word_bits = np.concatenate([self._word_bits, word_bits])
+        self._tail_bits = np.concatenate([self._tail_bits, tail_bits])
+        self._head_bits = np.concatenate([self._head_bits, head_bits])
+
+    @staticmethod
+    def _unpack(features: np.ndarray, masks: np.ndarray, columns: List[int]):
+        """Write per-query bitmask lanes into their keyword columns of features."""
+        bits = np.unpackbits(masks.astype("<u8").view(np.uint8), axis=1, bitorder="little")
+        features.T[columns] = bits[:, :len(columns)].T
+
+    def featurize(self, queries: List[str]) -> np.ndarray:
+        """Build the binary query x keyword matrix for lowercased queries."""
+        # Column-major, so each keyword column is written contiguously
+        features = np.zeros((len(self.keywords), len(queries)), dtype=np.float32).T
+        if not queries:
+            return features
+
+        # Split the whole chunk at once; a NUL word opens every query, so
+        # its positions give the query boundaries and, holding no keyword,
+        # it breaks every bigram that would span two queries. Splitting on
+        # single spaces keeps substring semantics exact: "tech  stack" gives
+        # an empty word in between and tabs stay inside words
+        if any("\0" in query for query in queries):
+            queries = [query.replace("\0", "\1") for query in queries]
+        words = ("\0 " + " \0 ".join(queries)).split(" ")
+
+        unseen = set(words).difference(self._vocabulary)
+        if len(self._vocabulary) + len(unseen) > self.max_vocabulary:
+            self._vocabulary.clear()
+            self._word_bits = self._word_bits[:0]
+            self._tail_bits = self._tail_bits[:0]
+            self._head_bits = self._head_bits[:0]
+            unseen = set(words)
+        if unseen:
+            self._add_words(list(unseen))
+        ids = np.fromiter(map(self._vocabulary.__getitem__, words), dtype=np.int64, count=len(words))
+        query_starts = ids == self._vocabulary["\0"]
+        starts = np.flatnonzero(query_starts)
+        rows = np.cumsum(query_starts) - 1
+
+        # Single-word keywords: OR each query's word bitmasks together
+        word_masks = np.bitwise_or.reduceat(self._word_bits[ids], starts, axis=0)
+        self._unpack(features, word_masks, [column for column, _ in self._word_keywords])
+
+        # Two-word keywords: "a b" is in "w1 w2" exactly when w1 ends with a
+        # and w2 starts with b
+        pairs = self._tail_bits[ids[:-1]] & self._head_bits[ids[1:]]
+        hit = pairs.any(axis=1).nonzero()[0]
+        bigram_masks = np.zeros((len(queries), self._bigram_lanes), dtype=np.uint64)
+        np.bitwise_or.at(bigram_masks, rows[hit], pairs[hit])
+        self._unpack(features, bigram_masks, [column for column, _ in self._bigram_keywords])
+
+        # Longer phrases: one regex pass over the whole chunk finds the few
+        # queries that hold any, then a plain substring check per phrase
+        if self._phrase_keywords:
+            for row in self._matching_rows(self._any_phrase, queries):
+                for column, phrase in self._phrase_keywords:
+                    if phrase in queries[row]:
+                        features[row, column] = 1.0
+        return features
+
+    def classify_chunk(self, queries: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classify one chunk of queries.
+
+        Returns:
+            (intent ids into self.labels, confidences in [0, 1]); confidence
+            is the winning rule's share of all matched keywords
+        """
+        if not queries:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        limit = self.max_query_length
+        # Query logs repeat heavily, so only distinct queries are scored
+        lowered = [query[:limit].lower() for query in queries]
+        unique = list(dict.fromkeys(lowered))
+        positions = dict(zip(unique, range(len(unique))))
+        inverse = np.fromiter(map(positions.__getitem__, lowered), dtype=np.int64, count=len(lowered))
+        scores = self.featurize(unique) @ self.rule_matrix
+        matched = scores > 0
+
+        has_match = matched.any(axis=1)
+        intent_ids = np.where(has_match, np.argmax(matched, axis=1), self.unknown_id)
+
+        winner = scores[np.arange(len(unique)), np.minimum(intent_ids, scores.shape[1] - 1)]
+        totals = np.maximum(scores.sum(axis=1), 1.0)
+        confidences = np.where(has_match, winner / totals, 0.0).astype(np.float32)
+
+        return intent_ids[inverse], confidences[inverse]
+
+    def classify_stream(self, queries: Iterable[str]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Classify an iterable of queries chunk by chunk, yielding (ids, confidences)."""
+        iterator = iter(queries)
+        while True:
+            chunk = list(islice(iterator, self.chunk_size))
+            if not chunk:
+                return
+            yield self.classify_chunk(chunk)
+
+    def intent_counts(self, queries: Iterable[str]) -> Dict[str, int]:
+        """Count queries per intent label across a whole log."""
+        totals = np.zeros(len(self.labels), dtype=np.int64)
+        for intent_ids, _ in self.classify_stream(queries):
+            totals += np.bincount(intent_ids, minlength=len(self.labels))
+        return {label: int(count) for label, count in zip(self.labels, totals) if count}
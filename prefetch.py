@@ -0,0 +1,346 @@
+"""
+Speculative Follow-up Prefetcher
+Generates likely next answers in the background and serves them from a
+short-TTL cache when the user actually asks the follow-up
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+from github_profile_bot import INTENT_RULES, UNKNOWN_INTENT, GitHubProfileBot, word_pattern
+
+
+# A follow-up key identifies a question precisely enough that a cached
+# answer can be served for it: (kind, project name or roadmap focus or None)
+FollowUpKey = Tuple[str, Optional[str]]
+
+# Project follow-up kinds, checked before the general intent rules so that
+# "what's its tech stack?" resolves against the project being discussed.
+# Matched as whole words; general words like "technologies" are left out
+# because "what technologies do you know?" is not about the project
+PROJECT_FOLLOW_UP_RULES: List[Tuple[str, List[str]]] = [
+    ("tech_stack", ["tech stack", "stack", "built with", "built using", "technologies used"]),
+    ("improvement", ["improve", "improved", "improvement", "improvements", "better", "enhance"]),
+    ("learned", ["learn", "learned", "learnt", "lesson", "lessons", "takeaway", "takeaways"]),
+]
+
+# General intents whose answer does not depend on conversation context
+STANDALONE_INTENTS = {
+    "about", "skills", "expertise", "projects", "new_projects", "roadmap",
+    "career", "recruiter", "ai_ml", "fullstack",
+}
+
+# Canonical question sent upstream when prefetching a key
+FOLLOW_UP_QUESTIONS: Dict[str, str] = {
+    "project_details": "Tell me about the {arg} project.",
+    "tech_stack": "What tech stack did you use for {arg}, and why?",
+    "improvement": "How could {arg} be improved?",
+    "learned": "What did you learn from building {arg}?",
+    "about": "Tell me about yourself.",
+    "skills": "What skills do you have?",
+    "expertise": "What are your areas of expertise?",
+    "projects": "Show me all your projects.",
+    "new_projects": "What new projects should I build?",
+    "roadmap": "What learning roadmap would you suggest for {arg}?",
+    "career": "What are your career interests?",
+    "recruiter": "Pitch yourself to a recruiter.",
+    "ai_ml": "What is your AI/ML specialist profile?",
+    "fullstack": "What is your full-stack developer profile?",
+}
+
+# Static intent graph used until enough transitions have been observed
+STATIC_FOLLOW_UPS: Dict[str, List[str]] = {
+    "project_details": ["tech_stack", "improvement", "learned"],
+    "tech_stack": ["improvement", "learned"],
+    "improvement": ["learned", "new_projects"],
+    "learned": ["improvement", "new_projects"],
+    "about": ["skills", "projects", "career"],
+    "skills": ["projects", "expertise"],
+    "expertise": ["projects", "ai_ml"],
+    "projects": ["project_details"],
+    "new_projects": ["roadmap"],
+    "roadmap": ["new_projects", "career"],
+    "career": ["recruiter", "roadmap"],
+    "recruiter": ["ai_ml", "fullstack"],
+    "ai_ml": ["projects", "roadmap"],
+    "fullstack": ["projects", "roadmap"],
+}
+
+
+FOLLOW_UP_PATTERNS: List[Tuple[str, Pattern]] = [
+    (kind, word_pattern(keywords)) for kind, keywords in PROJECT_FOLLOW_UP_RULES
+]
+
+PROJECT_KEYWORD_PATTERNS: List[Tuple[str, Pattern]] = [
+    (arg, word_pattern(keywords)) for intent, arg, keywords in INTENT_RULES if intent == "project_details"
+]
+
+
+class FollowUpPrefetcher:
+    """
+    Opt-in speculative generation of the top-k likely follow-up answers.
+
+    After each response the prefetcher predicts the next questions from
+    observed session transitions (falling back to a static intent graph),
+    generates them in the background within a token budget, and holds the
+    answers for `ttl` seconds. Hit rate and wasted tokens are tracked so
+    `top_k`, `max_tokens` and the budget can be tuned.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str, int], Tuple[str, int]],
+        classifier: GitHubProfileBot,
+        top_k: int = 2,
+        ttl: float = 120.0,
+        max_tokens: int = 512,
+        token_budget: int = 20000,
+        budget_window: float = 3600.0,
+        max_workers: int = 2,
+        max_sessions: int = 10000,
+        input_tokens: int = 0,
+    ):
+        """
+        Args:
+            generate: Callable(prompt, max_tokens) -> (text, tokens_used)
+            classifier: Rule-based bot used for local intent detection
+            top_k: Follow-ups prefetched after each response
+            ttl: Seconds a prefetched answer stays servable
+            max_tokens: Output token cap per prefetched answer
+            token_budget: Tokens that may be spent per budget_window
+            budget_window: Length of the budget window in seconds
+            max_workers: Concurrent background generations
+            max_sessions: Sessions whose last question is remembered
+            input_tokens: Estimated fixed input per request (e.g. the system
+                prompt), reserved on top of the question and max_tokens
+        """
+        self.generate = generate
+        self.classifier = classifier
+        self.top_k = top_k
+        self.ttl = ttl
+        self.max_tokens = max_tokens
+        self.token_budget = token_budget
+        self.budget_window = budget_window
+        self.max_sessions = max_sessions
+        self.input_tokens = input_tokens
+
+        self.project_names = [p.get("name") for p in classifier.projects.values()]
+        self.transitions: Dict[FollowUpKey, Counter] = defaultdict(Counter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, FollowUpKey], Tuple[str, int, float]] = {}
+        self._in_flight = set()
+        self._last_key: "OrderedDict[str, FollowUpKey]" = OrderedDict()
+        self._window_start = time.time()
+        self._window_spent = 0
+        self.stats = Counter()
+
+    # ============ Key Resolution ============
+
+    def _mentioned_project(self, query_lower: str) -> Optional[str]:
+        """Find the project a query names, by full name or intent keyword."""
+        for name in self.project_names:
+            if name.lower() in query_lower:
+                return name
+        for arg, pattern in PROJECT_KEYWORD_PATTERNS:
+            if pattern.search(query_lower):
+                return arg
+        return None
+
+    def follow_up_key(self, query: str, session: str = "") -> Optional[FollowUpKey]:
+        """
+        Resolve a query to a cache key, or None if it is too ambiguous to
+        be answered from a prefetched response.
+
+        A query that does not name a project only inherits the project from
+        the session's previous question when, apart from the follow-up
+        words, it has no subject of its own ("how can I improve my skills?"
+        is about skills, not the last project).
+        """
+        query_lower = query.lower()
+        kinds = [kind for kind, pattern in FOLLOW_UP_PATTERNS if pattern.search(query_lower)]
+        mentioned = self._mentioned_project(query_lower)
+        project = mentioned
+        if project is None and kinds:
+            last = self._last_key.get(session)
+            if last and last[0] in ("project_details", "tech_stack", "improvement", "learned"):
+                remainder = query_lower
+                for _, pattern in FOLLOW_UP_PATTERNS:
+                    remainder = pattern.sub(" ", remainder)
+                if self.classifier.classify_intent(remainder)[0] == UNKNOWN_INTENT:
+                    project = last[1]
+
+        if project:
+            if len(kinds) == 1:
+                return kinds[0], project
+            if len(kinds) > 1:
+                return None
+            if mentioned:
+                return "project_details", project
+        elif kinds:
+            # Asks how to improve or what was learned, but not about a project
+            return None
+
+        intent, arg = self.classifier.classify_intent(query)
+        if intent in STANDALONE_INTENTS:
+            return intent, arg
+        return None
+
+    # ============ Serving ============
+
+    def lookup(self, query: str, session_id: Optional[str] = None) -> Optional[str]:
+        """Return a prefetched answer for this query if one is still fresh."""
+        session = session_id or ""
+        key = self.follow_up_key(query, session)
+        if key is None:
+            return None
+
+        with self._lock:
+            entry = self._cache.pop((session, key), None)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            text, tokens, expires_at = entry
+            if expires_at < time.time():
+                self.stats["misses"] += 1
+                self.stats["expired"] += 1
+                self.stats["wasted_tokens"] += tokens
+                return None
+            self.stats["hits"] += 1
+            self.stats["served_tokens"] += tokens
+            return text
+
+    def observe(self, query: str, session_id: Optional[str] = None):
+        """Record a completed exchange and prefetch its likely follow-ups."""
+        session = session_id or ""
+        key = self.follow_up_key(query, session)
+
+        with self._lock:
+            previous = self._last_key.get(session)
+            if previous and key:
+                self.transitions[previous][key] += 1
+            if key:
+                self._last_key[session] = key
+                self._last_key.move_to_end(session)
+                while len(self._last_key) > self.max_sessions:
+                    self._last_key.popitem(last=False)
+            self._evict_expired()
+
+        if key:
+            for candidate in self.predict(key):
+                self._schedule(session, candidate)
+
+    # ============ Prediction ============
+
+    def predict(self, key: FollowUpKey) -> List[FollowUpKey]:
+        """Rank likely next keys: observed transitions first, then the static graph."""
+        ranked = [k for k, _ in self.transitions[key].most_common() if k != key]
+
+        kind, arg = key
+        for next_kind in STATIC_FOLLOW_UPS.get(kind, []):
+            if next_kind in ("tech_stack", "improvement", "learned"):
+                candidates = [(next_kind, arg)] if kind != "projects" and arg else []
+            elif next_kind == "project_details":
+                candidates = [("project_details", name) for name in self.project_names]
+            elif next_kind == "roadmap":
+                candidates = [("roadmap", arg if kind == "roadmap" else "general")]
+            else:
+                candidates = [(next_kind, None)]
+            ranked.extend(c for c in candidates if c not in ranked and c != key)
+
+        return ranked[:self.top_k]
+
+    # ============ Background Generation ============
+
+    @staticmethod
+    def prompt_for(key: FollowUpKey) -> str:
+        """Canonical question sent upstream to prefetch key."""
+        kind, arg = key
+        return FOLLOW_UP_QUESTIONS[kind].format(arg=arg or "general development")
+
+    def _estimate_tokens(self, prompt: str) -> int:
+        """Worst-case tokens for one request: estimated input plus max_tokens."""
+        # ~4 characters per token is close enough for budgeting
+        return self.input_tokens + len(prompt) // 4 + 1 + self.max_tokens
+
+    def _reserve_budget(self, tokens: int) -> Optional[float]:
+        """
+        Reserve tokens from the current window; caller holds the lock.
+
+        Returns:
+            The window's start time, needed to settle the reservation, or
+            None if the budget does not allow it
+        """
+        now = time.time()
+        if now - self._window_start >= self.budget_window:
+            self._window_start = now
+            self._window_spent = 0
+        if self._window_spent + tokens > self.token_budget:
+            self.stats["skipped_budget"] += 1
+            return None
+        self._window_spent += tokens
+        return self._window_start
+
+    def _settle_budget(self, window: float, reserved: int, spent: int):
+        """Replace a reservation with the tokens actually spent; caller holds the lock."""
+        # A reservation from a window that has since reset is not carried over
+        if window != self._window_start:
+            return
+        self._window_spent = max(self._window_spent + spent - reserved, 0)
+
+    def _schedule(self, session: str, key: FollowUpKey):
+        """Start generating an answer for key unless cached, running or over budget."""
+        prompt = self.prompt_for(key)
+        reserved = self._estimate_tokens(prompt)
+        with self._lock:
+            cache_key = (session, key)
+            if cache_key in self._cache or cache_key in self._in_flight:
+                return
+            window = self._reserve_budget(reserved)
+            if window is None:
+                return
+            self._in_flight.add(cache_key)
+        self._executor.submit(self._prefetch, cache_key, prompt, window, reserved)
+
+    def _prefetch(self, cache_key: Tuple[str, FollowUpKey], prompt: str, window: float, reserved: int):
+        """Generate and cache one follow-up answer, then settle its reservation."""
+        try:
+            text, tokens = self.generate(prompt, self.max_tokens)
+        except Exception:
+            with self._lock:
+                self._in_flight.discard(cache_key)
+                self._settle_budget(window, reserved, 0)
+                self.stats["errors"] += 1
+            return
+
+        with self._lock:
+            self._in_flight.discard(cache_key)
+            self._settle_budget(window, reserved, tokens)
+            self._cache[cache_key] = (text, tokens, time.time() + self.ttl)
+            self.stats["prefetched"] += 1
+            self.stats["prefetch_tokens"] += tokens
+
+    def _evict_expired(self):
+        """Drop expired answers and count their tokens as wasted; caller holds the lock."""
+        now = time.time()
+        for cache_key in [k for k, (_, _, expires_at) in self._cache.items() if expires_at < now]:
+            _, tokens, _ = self._cache.pop(cache_key)
+            self.stats["expired"] += 1
+            self.stats["wasted_tokens"] += tokens
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get prefetch counters plus derived hit rate."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cached"] = len(self._cache)
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        stats["hit_rate"] = stats.get("hits", 0) / lookups if lookups else 0.0
+        return stats
+
+    def shutdown(self):
+        """Stop background generation."""
+        self._executor.shutdown(wait=False)
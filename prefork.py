@@ -0,0 +1,120 @@
+"""
+Pre-fork Helpers
+Build shared read-only portfolio structures once in the master process,
+freeze the GC heap before forking and report per-worker memory
+"""
+
+import gc
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+def build_static_payloads(bot: Any) -> Dict[str, Any]:
+    """
+    Precompute the JSON payloads served by the read-only info endpoints.
+
+    Args:
+        bot: ClaudePortfolioBot or GitHubProfileBot instance
+
+    Returns:
+        Mapping of payload name to ready-to-serialize response data
+    """
+    portfolio = bot.portfolio_data
+    projects = portfolio.get("projects", [])
+
+    return {
+        "developer": portfolio.get("developer", {}),
+        "projects": [
+            {
+                "id": p["id"],
+                "name": p.get("name"),
+                "subtitle": p.get("subtitle"),
+                "type": p.get("type")
+            }
+            for p in projects
+        ],
+        "project_by_id": {p["id"]: p for p in projects},
+    }
+
+
+def freeze_heap():
+    """
+    Move every object currently tracked by the GC into the permanent generation.
+
+    Collections in forked workers then never touch (and so never copy) the
+    pages holding the preloaded portfolio, prompt and payloads. Call it
+    with the GC disabled since startup and without collecting first: a
+    collection here would leave holes in the already-allocated pages that
+    the first allocations in each worker fill, dirtying them anyway.
+    """
+    gc.freeze()
+
+
+def _read_smaps_rollup(pid: str) -> Optional[Dict[str, int]]:
+    """Parse /proc/<pid>/smaps_rollup into kilobyte counters (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    counters = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) == 3 and parts[2] == "kB":
+            counters[parts[0].rstrip(":")] = int(parts[1])
+    return counters
+
+
+def memory_report(pid: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Report resident memory for a process, split into shared and unique parts.
+
+    `unique_kb` (USS) is the memory that would be freed if the worker exited;
+    it is the number to watch when comparing preload on and off.
+    """
+    pid = pid or os.getpid()
+    counters = _read_smaps_rollup(str(pid))
+    report: Dict[str, Any] = {
+        "pid": pid,
+        "gc_frozen_objects": gc.get_freeze_count(),
+    }
+    if counters is None:
+        report["error"] = "smaps_rollup not available on this platform"
+        return report
+
+    report.update({
+        "rss_kb": counters.get("Rss", 0),
+        "pss_kb": counters.get("Pss", 0),
+        "shared_kb": counters.get("Shared_Clean", 0) + counters.get("Shared_Dirty", 0),
+        "unique_kb": counters.get("Private_Clean", 0) + counters.get("Private_Dirty", 0),
+    })
+    return report
+
+
+def start_memory_reporter(log: Callable[[Dict[str, Any]], None], delay: float = 60.0, interval: float = 300.0) -> threading.Thread:
+    """
+    Report this process's memory after a warm-up delay, then periodically.
+
+    Right after fork almost nothing has been copied yet, so an immediate
+    reading says nothing about sharing; by the first report the worker has
+    served traffic and run collections.
+
+    Args:
+        log: Called with each memory_report()
+        delay: Seconds before the first report
+        interval: Seconds between later reports (0 reports once)
+    """
+    def run():
+        time.sleep(delay)
+        while True:
+            log(memory_report())
+            if interval <= 0:
+                return
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="memory-report", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,161 @@
+"""
+Intent-aware Generation Profiles
+Pick model tier, token limit, temperature and stop sequences per query intent,
+escalating from a fast model to a larger one only when needed
+"""
+
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from github_profile_bot import UNKNOWN_INTENT, GitHubProfileBot, word_pattern
+
+
+FAST_MODEL = "claude-3-5-haiku-20241022"
+LARGE_MODEL = "claude-3-5-sonnet-20241022"
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Generation parameters for one class of query."""
+    name: str
+    model: str
+    max_tokens: int
+    temperature: float
+    stop_sequences: Tuple[str, ...] = ()
+    escalate_to: Optional[str] = None
+    # Seconds a healthy upstream needs to generate up to max_tokens; the
+    # circuit breaker only counts a call as slow past this budget
+    latency_budget: float = 20.0
+
+
+# No built-in profile sets stop_sequences: answers are free-form prose or
+# code with no delimiter to stop at, so limits come from max_tokens alone
+PROFILES: Dict[str, GenerationProfile] = {
+    profile.name: profile
+    for profile in [
+        # Short factual answers straight from the portfolio data
+        GenerationProfile("lookup", FAST_MODEL, 512, 0.2, escalate_to="general", latency_budget=10.0),
+        # Project walkthroughs: tech stack, features, learnings
+        GenerationProfile("project", FAST_MODEL, 1024, 0.3, escalate_to="general", latency_budget=20.0),
+        # Roadmaps, improvement ideas and new project suggestions
+        GenerationProfile("advice", FAST_MODEL, 1024, 0.6, escalate_to="general", latency_budget=20.0),
+        GenerationProfile("pitch", LARGE_MODEL, 512, 0.7, latency_budget=20.0),
+        GenerationProfile("concept", LARGE_MODEL, 1024, 0.4, latency_budget=30.0),
+        GenerationProfile("code", LARGE_MODEL, 2048, 0.2, latency_budget=60.0),
+        # Queries no intent rule recognizes start on the fast tier too
+        GenerationProfile("triage", FAST_MODEL, 1024, 0.7, escalate_to="general", latency_budget=20.0),
+        GenerationProfile("general", LARGE_MODEL, 2048, 0.7, latency_budget=60.0),
+    ]
+}
+
+# Intents from GitHubProfileBot.classify_intent mapped to profiles;
+# anything unlisted uses "general"
+INTENT_PROFILES: Dict[str, str] = {
+    "about": "lookup",
+    "skills": "lookup",
+    "expertise": "lookup",
+    "projects": "lookup",
+    "career": "lookup",
+    "project_details": "project",
+    "tech_stack": "project",
+    "improvement": "advice",
+    "new_projects": "advice",
+    "roadmap": "advice",
+    "recruiter": "pitch",
+    "ai_ml": "pitch",
+    "fullstack": "pitch",
+    UNKNOWN_INTENT: "triage",
+}
+
+# Code requests need the large model whatever portfolio topic they mention;
+# matched as whole words so "decode" or "barcode" do not count
+CODE_KEYWORDS = ["code", "implement", "snippet", "function", "functions", "write a"]
+
+# Contact details are plain portfolio facts, but no intent rule covers them
+CONTACT_KEYWORDS = ["github", "contact", "email", "linkedin", "link", "links", "reach you"]
+
+CODE_PATTERN = word_pattern(CODE_KEYWORDS)
+CONTACT_PATTERN = word_pattern(CONTACT_KEYWORDS)
+
+
+class ProfileRouter:
+    """
+    Classify queries with the local intent matcher, choose a profile and
+    keep per-profile latency and token metrics.
+    """
+
+    def __init__(self, classifier: GitHubProfileBot, profiles: Optional[Dict[str, GenerationProfile]] = None):
+        """Initialize router with a rule-based classifier and profile table."""
+        self.classifier = classifier
+        self.profiles = profiles or PROFILES
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def select(self, query: str) -> GenerationProfile:
+        """Choose the generation profile for a user query."""
+        query_lower = query.lower()
+        if CODE_PATTERN.search(query_lower):
+            return self.profiles["code"]
+        if CONTACT_PATTERN.search(query_lower):
+            return self.profiles["lookup"]
+
+        intent, _ = self.classifier.classify_intent(query)
+        # "Tell me about SmartLeaf" hits the "about" rule before any project rule
+        if intent == "about" and self._names_project(query_lower):
+            return self.profiles["project"]
+        return self.profiles[INTENT_PROFILES.get(intent, "general")]
+
+    def _names_project(self, query_lower: str) -> bool:
+        """Check whether a query names one of the portfolio projects."""
+        return any(
+            project.get("name", "").lower() in query_lower
+            for project in self.classifier.projects.values()
+        )
+
+    def get(self, name: str) -> GenerationProfile:
+        """Look up a profile by name."""
+        return self.profiles[name]
+
+    def escalation_for(self, profile: GenerationProfile, text: str, stop_reason: Optional[str]) -> Optional[GenerationProfile]:
+        """
+        Quality check on a finished response.
+
+        Returns:
+            The profile to retry with, or None if the response is acceptable
+        """
+        if not profile.escalate_to:
+            return None
+        # Only a truncated or empty answer means the query outgrew the fast
+        # tier; short answers are legitimate for lookups
+        if stop_reason == "max_tokens" or not text.strip():
+            return self.profiles[profile.escalate_to]
+        return None
+
+    def record(self, profile: GenerationProfile, latency: float, input_tokens: int, output_tokens: int, escalated: bool = False):
+        """Record one upstream call made with a profile."""
+        with self._lock:
+            metrics = self._metrics[profile.name]
+            metrics["requests"] += 1
+            metrics["latency_total_ms"] += latency * 1000
+            metrics["input_tokens"] += input_tokens
+            metrics["output_tokens"] += output_tokens
+            if escalated:
+                metrics["escalations"] += 1
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get per-profile request counts, average latency and token totals."""
+        with self._lock:
+            stats = {}
+            for name, metrics in self._metrics.items():
+                requests = metrics["requests"]
+                stats[name] = {
+                    "model": self.profiles[name].model,
+                    "requests": int(requests),
+                    "escalations": int(metrics["escalations"]),
+                    "avg_latency_ms": round(metrics["latency_total_ms"] / requests, 1) if requests else 0.0,
+                    "input_tokens": int(metrics["input_tokens"]),
+                    "output_tokens": int(metrics["output_tokens"]),
+                }
+            return stats
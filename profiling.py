@@ -0,0 +1,219 @@
+"""
+On-demand Request Profiling
+Span timings for internal stages plus a sampled call-stack profile, written
+as collapsed stacks (flamegraph.pl / speedscope) and speedscope JSON
+"""
+
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+
+_current: ContextVar[Optional["RequestProfiler"]] = ContextVar("request_profiler", default=None)
+_NULL_SPAN = nullcontext()
+
+
+def span(name: str):
+    """
+    Time a stage of the current request.
+
+    Returns a shared no-op context manager when no profiler is active, so
+    instrumented code costs one context-variable lookup when disabled.
+    """
+    profiler = _current.get()
+    if profiler is None:
+        return _NULL_SPAN
+    return profiler.span(name)
+
+
+def should_profile(header_value: Optional[str], sample_rate: float, header_secret: Optional[str] = None) -> bool:
+    """
+    Decide whether to profile a request from its opt-in header or sampling.
+
+    The header is only honored when the operator configured `header_secret`
+    and the header carries exactly that value; otherwise any client could
+    make the server write profile files.
+    """
+    if header_secret and header_value and hmac.compare_digest(header_value, header_secret):
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+class RequestProfiler:
+    """
+    Low-overhead profiler for a single request.
+
+    Spans record wall time per stage. While active, a background thread
+    samples the request thread's call stack every `sample_interval` seconds;
+    samples are prefixed with the open span path so flamegraphs group by stage.
+    """
+
+    def __init__(self, name: str = "request", output_dir: str = "profiles", sample_interval: float = 0.005, max_files: int = 200):
+        """Create a profiler; call start() to begin recording."""
+        self.name = name
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.max_files = max_files
+        self.profile_id = uuid.uuid4().hex[:12]
+
+        self._origin = 0.0
+        self._stack: List[str] = []
+        self._events: List[Tuple[str, str, float]] = []
+        self._durations: Dict[str, float] = Counter()
+        self._samples: Counter = Counter()
+        self._thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._token = None
+
+    # ============ Lifecycle ============
+
+    def start(self) -> "RequestProfiler":
+        """Activate for the calling thread and start stack sampling."""
+        self._origin = time.perf_counter()
+        self._thread_id = threading.get_ident()
+        self._token = _current.set(self)
+        self._sampler = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def detach(self):
+        """Deactivate for the current context while sampling continues."""
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+
+    @contextmanager
+    def activate(self):
+        """Re-activate in a later context, e.g. a streaming response generator."""
+        token = _current.set(self)
+        self._thread_id = threading.get_ident()
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def finish(self) -> Dict[str, float]:
+        """
+        Stop sampling, write profile files and return per-stage timings.
+
+        Returns:
+            Mapping of stage name to total milliseconds
+        """
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        self.detach()
+        self._write_files()
+        return self.timings()
+
+    def timings(self) -> Dict[str, float]:
+        """Get total milliseconds spent in each stage so far."""
+        return {name: round(total * 1000, 3) for name, total in self._durations.items()}
+
+    def server_timing(self) -> str:
+        """Format stage timings as a Server-Timing header value."""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.timings().items())
+
+    # ============ Recording ============
+
+    @contextmanager
+    def span(self, name: str):
+        """Record wall time for a named stage, nested under any open stage."""
+        started = time.perf_counter()
+        self._stack.append(name)
+        self._events.append(("O", name, started - self._origin))
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            self._stack.pop()
+            self._events.append(("C", name, ended - self._origin))
+            self._durations[name] += ended - started
+
+    def _sample_loop(self):
+        """Sample the request thread's stack until stopped."""
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            frames.reverse()
+
+            self._samples[";".join([self.name] + list(self._stack) + frames)] += 1
+
+    # ============ Export ============
+
+    def _write_files(self):
+        """Write collapsed stacks and a speedscope profile of the spans."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        stem = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.profile_id}")
+
+        if self._samples:
+            with open(f"{stem}.collapsed", "w") as f:
+                for stack, count in self._samples.items():
+                    f.write(f"{stack} {count}\n")
+
+        frames: List[Dict[str, str]] = []
+        frame_index: Dict[str, int] = {}
+        events = []
+        for kind, name, at in self._events:
+            if name not in frame_index:
+                frame_index[name] = len(frames)
+                frames.append({"name": name})
+            events.append({"type": kind, "frame": frame_index[name], "at": round(at * 1000, 3)})
+
+        end_value = events[-1]["at"] if events else 0
+        speedscope = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "evented",
+                "name": self.name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": end_value,
+                "events": events,
+            }],
+            "name": f"{self.name} {self.profile_id}",
+        }
+        with open(f"{stem}.speedscope.json", "w") as f:
+            json.dump(speedscope, f)
+
+        self._prune_files()
+
+    def _prune_files(self):
+        """Delete the oldest profiles so at most max_files are kept (0 keeps all)."""
+        if self.max_files <= 0:
+            return
+        # One profile is a .collapsed and/or .speedscope.json sharing a stem
+        profiles: Dict[str, List[str]] = {}
+        written: Dict[str, float] = {}
+        for entry in os.scandir(self.output_dir):
+            for suffix in (".collapsed", ".speedscope.json"):
+                if entry.is_file() and entry.name.endswith(suffix):
+                    stem = entry.name[:-len(suffix)]
+                    profiles.setdefault(stem, []).append(entry.path)
+                    written[stem] = max(written.get(stem, 0.0), entry.stat().st_mtime)
+
+        for stem in sorted(profiles, key=written.get)[:-self.max_files]:
+            for path in profiles[stem]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Another worker may have pruned it already
+                    pass
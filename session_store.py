@@ -0,0 +1,216 @@
+"""
+Durable Conversation Session Store
+SQLite (WAL mode) backend so any worker process can continue a conversation
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_turns_session_seq ON turns (session_id, seq);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at);
+"""
+
+
+class SQLiteSessionStore:
+    """
+    Append-only conversation store shared by all worker processes.
+
+    Turns are buffered in memory and written behind in batches by a
+    background thread. Reads only fetch the last N turns of a session
+    through the (session_id, seq) index, so per-request I/O stays bounded
+    no matter how long a conversation grows.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "sessions.db",
+        flush_interval: float = 0.05,
+        max_batch: int = 256,
+        session_ttl: float = 7 * 24 * 3600,
+        compact_interval: float = 3600,
+    ):
+        """Open (or create) the database and start the write-behind thread."""
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.session_ttl = session_ttl
+        self.compact_interval = compact_interval
+
+        self._local = threading.local()
+        self._pending: List[Tuple[str, str, str, float]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+        self._start_writer()
+        # Connections and threads do not survive fork(); pre-forking servers
+        # get a fresh pair in every worker
+        os.register_at_fork(after_in_child=self._after_fork)
+        # The writer is a daemon thread, so flush whatever is still buffered
+        # on interpreter exit (graceful restarts, worker recycling)
+        atexit.register(self.close)
+
+    def _start_writer(self):
+        """Start the background write-behind thread."""
+        self._writer = threading.Thread(target=self._write_behind, name="session-writer", daemon=True)
+        self._writer.start()
+
+    def _after_fork(self):
+        """Reset per-process state in a freshly forked worker."""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = []
+        if not self._closed:
+            self._start_writer()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ============ Writes ============
+
+    def append(self, session_id: str, role: str, content: str):
+        """Queue a single turn for the next batched write."""
+        with self._lock:
+            self._pending.append((session_id, role, content, time.time()))
+            if len(self._pending) >= self.max_batch:
+                self._wakeup.set()
+
+    def flush(self):
+        """Write all buffered turns in a single transaction."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+
+            last_seen: Dict[str, float] = {}
+            for session_id, _, _, created_at in batch:
+                last_seen[session_id] = created_at
+
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO turns (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                    batch,
+                )
+                conn.executemany(
+                    "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+                    last_seen.items(),
+                )
+
+    def _write_behind(self):
+        """Background loop flushing buffered turns and compacting periodically."""
+        next_compaction = time.time() + self.compact_interval
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                if self.compact_interval and time.time() >= next_compaction:
+                    self.compact()
+                    next_compaction = time.time() + self.compact_interval
+            except sqlite3.Error as e:
+                print(f"Session store maintenance failed: {e}")
+
+    # ============ Reads ============
+
+    def recent_turns(self, session_id: str, limit: int = 20) -> List[Dict[str, str]]:
+        """
+        Get the last `limit` turns of a session in chronological order.
+
+        Turns still waiting in this process's write-behind buffer are
+        included so a worker always sees its own latest writes.
+        """
+        # Holding the flush lock keeps a batch from being counted twice
+        # (or not at all) while it moves from the buffer to the database
+        with self._flush_lock:
+            with self._lock:
+                pending = [
+                    {"role": role, "content": content}
+                    for sid, role, content, _ in self._pending
+                    if sid == session_id
+                ]
+
+            needed = limit - len(pending)
+            stored: List[Dict[str, str]] = []
+            if needed > 0:
+                rows = self._connection().execute(
+                    "SELECT role, content FROM turns WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                    (session_id, needed),
+                ).fetchall()
+                stored = [{"role": role, "content": content} for role, content in reversed(rows)]
+
+        return (stored + pending)[-limit:]
+
+    # ============ Maintenance ============
+
+    def compact(self, ttl: Optional[float] = None) -> int:
+        """
+        Delete sessions idle for longer than `ttl` seconds.
+
+        Returns:
+            Number of sessions removed
+        """
+        cutoff = time.time() - (self.session_ttl if ttl is None else ttl)
+        self.flush()
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "DELETE FROM turns WHERE session_id IN "
+                "(SELECT session_id FROM sessions WHERE updated_at < ?)",
+                (cutoff,),
+            )
+            removed = conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,)).rowcount
+        return removed
+
+    def delete_session(self, session_id: str):
+        """Remove every turn of a session, including buffered ones."""
+        with self._lock:
+            self._pending = [t for t in self._pending if t[0] != session_id]
+        self.flush()
+
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def close(self):
+        """Stop the write-behind thread and flush what is left; safe to call twice."""
+        self._closed = True
+        self._wakeup.set()
+        if self._writer.is_alive() and self._writer is not threading.current_thread():
+            self._writer.join(timeout=5)
+        self.flush()
@@ -0,0 +1,91 @@
+"""
+Regression checks for follow-up key resolution in prefetch.py
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_profile_bot import GitHubProfileBot
+from prefetch import FollowUpPrefetcher
+
+
+def echo_generate(prompt: str, max_tokens: int):
+    """Fake upstream that answers with the question it was asked."""
+    return prompt, 1
+
+
+class FollowUpKeyTest(unittest.TestCase):
+    def setUp(self):
+        self.prefetcher = FollowUpPrefetcher(echo_generate, GitHubProfileBot(), top_k=0)
+
+    def resolve(self, *queries):
+        """Resolve a sequence of queries in one session, returning every key."""
+        keys = []
+        for query in queries:
+            keys.append(self.prefetcher.follow_up_key(query, "session"))
+            self.prefetcher.observe(query, "session")
+        return keys
+
+    def test_pronoun_follow_ups_inherit_project(self):
+        keys = self.resolve(
+            "Tell me about SmartLeaf",
+            "What's its tech stack?",
+            "How could it be improved?",
+            "What did you learn from it?",
+        )
+        self.assertEqual(keys, [
+            ("project_details", "SmartLeaf"),
+            ("tech_stack", "SmartLeaf"),
+            ("improvement", "SmartLeaf"),
+            ("learned", "SmartLeaf"),
+        ])
+
+    def test_learning_roadmap_is_not_a_project_follow_up(self):
+        keys = self.resolve(
+            "Tell me about SmartLeaf",
+            "What's its tech stack?",
+            "Can you suggest a learning roadmap for machine learning?",
+        )
+        self.assertEqual(keys[-1], ("roadmap", "ml"))
+
+    def test_improving_own_skills_is_not_a_project_follow_up(self):
+        keys = self.resolve("Tell me about SmartLeaf", "How can I improve my skills?")
+        self.assertIsNone(keys[-1])
+
+    def test_general_technologies_question_is_not_tech_stack(self):
+        keys = self.resolve("Tell me about SmartLeaf", "What technologies do you know?")
+        self.assertEqual(keys[-1], ("skills", None))
+
+
+class LookupTest(unittest.TestCase):
+    def test_unrelated_question_is_not_served_a_prefetched_answer(self):
+        prefetcher = FollowUpPrefetcher(echo_generate, GitHubProfileBot(), top_k=3)
+        prefetcher.observe("Tell me about SmartLeaf", "session")
+        deadline = time.time() + 5
+        while prefetcher.get_stats().get("prefetched", 0) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+
+        for query in (
+            "Can you suggest a learning roadmap for machine learning?",
+            "How can I improve my skills?",
+            "What technologies do you know?",
+        ):
+            self.assertIsNone(prefetcher.lookup(query, "session"), query)
+        self.assertEqual(prefetcher.get_stats().get("hits", 0), 0)
+
+        self.assertEqual(
+            prefetcher.lookup("What's its tech stack?", "session"),
+            "What tech stack did you use for SmartLeaf, and why?",
+        )
+        prefetcher.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()